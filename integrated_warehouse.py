@@ -3,18 +3,17 @@ Integrated Warehouse System
 Combines inventory management with warehouse layout and validation.
 Uses unified database persistence for both inventory and warehouse data.
 """
-import sys
-import os
-sys.path.append(os.path.abspath(os.path.dirname(__file__)))
-
 from inventory.inventory_manager import InventoryManager
 from inventory.item import Item
 from warehouse.layout import Warehouse
 from warehouse.models import ShelfLocation, SpecialNode, GridCell
 from persistence import UnifiedPersistence
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
+from collections import defaultdict
 from datetime import datetime
 
+import numpy as np
+
 
 class IntegratedWarehouse:
     """
@@ -52,8 +51,9 @@ class IntegratedWarehouse:
                     # Directly place shelf in grid (bypassing validation since we're loading from DB)
                     r, c = shelf.coordinates
                     if self.warehouse._in_bounds(r, c):
-                        self.warehouse.grid[r][c] = GridCell("shelf", shelf=shelf)
+                        self.warehouse._set_cell(r, c, GridCell("shelf", shelf=shelf))
                         self.warehouse.shelves.append(shelf)
+                        self.warehouse._shelves_by_id[shelf.id] = shelf
                 
                 # Load special nodes
                 nodes = self.persistence.load_all_special_nodes()
@@ -61,8 +61,10 @@ class IntegratedWarehouse:
                     # Directly place node in grid
                     r, c = node.coordinates
                     if self.warehouse._in_bounds(r, c):
-                        self.warehouse.grid[r][c] = GridCell(node.node_type, node=node)
+                        self.warehouse._set_cell(r, c, GridCell(node.node_type, node=node))
                         self.warehouse.special_nodes.append(node)
+                        self.warehouse._nodes_by_type.setdefault(node.node_type, []).append(node)
+                        self.warehouse._node_coords_by_type.pop(node.node_type, None)
             elif warehouse:
                 # Use provided warehouse and save it
                 self.warehouse = warehouse
@@ -78,32 +80,33 @@ class IntegratedWarehouse:
         # This will load items from DB (with skip_db=True to prevent duplicates)
         self.inventory_manager = InventoryManager(db_path=db_path, use_unified=True)
         
-        # Create shelf lookup by ID for quick validation
-        self.shelf_lookup: Dict[str, ShelfLocation] = {
-            shelf.id: shelf for shelf in self.warehouse.shelves
-        }
-        
         # Sync existing inventory items with shelf capacity (don't update DB here)
         self._sync_inventory_with_shelves(skip_db=True)
         
         # Sync shelf loads in database once at the end
         self.persistence.sync_shelf_loads()
     
+    @property
+    def shelf_lookup(self) -> Dict[str, ShelfLocation]:
+        """Shelf-id -> shelf mapping, owned and kept in sync by Warehouse."""
+        return self.warehouse._shelves_by_id
+
     def _sync_inventory_with_shelves(self, skip_db: bool = False):
         """Update shelf capacity tracking based on current inventory."""
-        # Reset all shelf loads
-        for shelf in self.warehouse.shelves:
-            shelf.current_load = 0
-        
-        # Count items per shelf
+        # Aggregate quantities per shelf in one pass over the inventory
+        loads: Dict[str, int] = defaultdict(int)
         for item in self.inventory_manager.list_all_items():
-            shelf_id = item.shelf_location
-            if shelf_id in self.shelf_lookup:
-                shelf = self.shelf_lookup[shelf_id]
-                shelf.current_load += item.quantity
-                # Update in database only if not skipping
-                if not skip_db:
-                    self.persistence.update_shelf_load(shelf_id, shelf.current_load)
+            loads[item.shelf_location] += item.quantity
+
+        # Assign aggregated loads to shelves (0 for empty shelves)
+        for shelf in self.warehouse.shelves:
+            shelf.current_load = loads.get(shelf.id, 0)
+
+        # Push all shelf loads to the database in a single transaction
+        if not skip_db:
+            self.persistence.update_shelf_loads_bulk(
+                {shelf.id: shelf.current_load for shelf in self.warehouse.shelves}
+            )
     
     def add_item(self, item: Item) -> bool:
         """
@@ -128,15 +131,13 @@ class IntegratedWarehouse:
             )
         
         shelf = self.shelf_lookup[shelf_id]
-        
-        # Check capacity
-        current_items_on_shelf = self.inventory_manager.get_by_shelf(shelf_id)
-        current_quantity = sum(i.quantity for i in current_items_on_shelf)
-        
-        if current_quantity + item.quantity > shelf.capacity:
+
+        # Check capacity — shelf.current_load already tracks the summed
+        # quantity on this shelf, so no need to rescan the shelf index
+        if shelf.current_load + item.quantity > shelf.capacity:
             raise ValueError(
                 f"Shelf '{shelf_id}' capacity exceeded. "
-                f"Current: {current_quantity}, Adding: {item.quantity}, "
+                f"Current: {shelf.current_load}, Adding: {item.quantity}, "
                 f"Capacity: {shelf.capacity}"
             )
         
@@ -175,32 +176,60 @@ class IntegratedWarehouse:
         
         return removed
     
-    def get_shelf_info(self, shelf_id: str) -> Optional[Dict]:
+    def get_shelf_info(self, shelf_id: str, include_items: bool = True) -> Optional[Dict]:
         """
         Get information about a shelf including inventory items.
-        
+
         Args:
             shelf_id: Shelf ID
-            
+            include_items: If False, skip materializing per-item dicts
+                (cheaper when only counts/loads are needed)
+
         Returns:
             Dictionary with shelf info and items, or None if shelf doesn't exist
         """
         if shelf_id not in self.shelf_lookup:
             return None
-        
+
         shelf = self.shelf_lookup[shelf_id]
         items = self.inventory_manager.get_by_shelf(shelf_id)
-        
+
         return {
             "shelf_id": shelf.id,
             "coordinates": shelf.coordinates,
             "capacity": shelf.capacity,
             "current_load": shelf.current_load,
             "available_space": shelf.capacity - shelf.current_load,
-            "items": [item.to_dict() for item in items],
+            "items": [item.to_dict() for item in items] if include_items else [],
             "item_count": len(items)
         }
     
+    def get_shelf_utilization_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Coordinates and utilization for every shelf as parallel arrays.
+
+        Returns:
+            (rows, cols, utilization) arrays, one entry per shelf, with
+            utilization = current_load / capacity (0 for zero-capacity
+            shelves). Lets vectorized consumers such as the Streamlit
+            heatmap fill their grids with one fancy-indexed assignment
+            instead of a per-shelf info dict each.
+        """
+        shelves = self.warehouse.shelves
+        n = len(shelves)
+        coords = self.warehouse.shelf_coords
+        loads = np.fromiter(
+            (s.current_load for s in shelves), dtype=np.float32, count=n)
+        caps = np.fromiter(
+            (s.capacity for s in shelves), dtype=np.float32, count=n)
+        utilization = np.divide(
+            loads, caps, out=np.zeros_like(loads), where=caps > 0)
+        return coords[:, 0], coords[:, 1], utilization
+
+    def _iter_shelf_items(self, shelf_id: str):
+        """Yield Item objects on a shelf without building any dicts."""
+        yield from self.inventory_manager.shelf_index.get(shelf_id, {}).values()
+
     def get_warehouse_status(self) -> Dict:
         """
         Get comprehensive warehouse status including layout and inventory.
@@ -209,24 +238,32 @@ class IntegratedWarehouse:
             Dictionary with warehouse status information
         """
         all_items = self.inventory_manager.list_all_items()
-        expiry_items = [
-            item for item in all_items 
-            if item.expiry and item.expiry < datetime.now()
-        ]
-        upcoming_expiry = [
-            item for item in self.inventory_manager.expiry_index
-            if item.expiry and item.expiry > datetime.now()
-        ]
-        
+
+        # Single pass over the inventory: quantity, expired and upcoming
+        # counts in one walk, with datetime.now() evaluated once
+        now = datetime.now()
+        total_quantity = 0
+        expired_count = 0
+        upcoming_count = 0
+        for item in all_items:
+            total_quantity += item.quantity
+            if item.expiry:
+                if item.expiry < now:
+                    expired_count += 1
+                elif item.expiry > now:
+                    upcoming_count += 1
+
         return {
             "total_items": len(all_items),
-            "total_quantity": sum(item.quantity for item in all_items),
+            "total_quantity": total_quantity,
             "shelf_count": len(self.warehouse.shelves),
-            "expired_items": len(expiry_items),
-            "upcoming_expiry_items": len(upcoming_expiry),
+            "expired_items": expired_count,
+            "upcoming_expiry_items": upcoming_count,
             "categories": list(self.inventory_manager.category_index.keys()),
             "shelves": {
-                shelf_id: self.get_shelf_info(shelf_id)
+                # Counts and loads only — callers needing item details use
+                # get_shelf_info directly
+                shelf_id: self.get_shelf_info(shelf_id, include_items=False)
                 for shelf_id in self.shelf_lookup.keys()
             }
         }
@@ -240,21 +277,22 @@ class IntegratedWarehouse:
         # Display grid
         self.warehouse.display()
         
-        # Display shelf details with inventory
+        # Display shelf details with inventory — read Item attributes
+        # directly, no per-item dict materialization needed just to print
         print("\n📦 SHELF INVENTORY DETAILS:")
         print("-" * 60)
         for shelf_id in sorted(self.shelf_lookup.keys()):
-            info = self.get_shelf_info(shelf_id)
-            if info:
-                print(f"\nShelf {shelf_id} (Capacity: {info['capacity']}, "
-                      f"Used: {info['current_load']}, "
-                      f"Available: {info['available_space']})")
-                if info['items']:
-                    for item in info['items']:
-                        print(f"  - {item['sku']}: {item['name']} "
-                              f"(Qty: {item['quantity']}, Category: {item['category']})")
-                else:
-                    print("  (Empty)")
+            shelf = self.shelf_lookup[shelf_id]
+            print(f"\nShelf {shelf_id} (Capacity: {shelf.capacity}, "
+                  f"Used: {shelf.current_load}, "
+                  f"Available: {shelf.capacity - shelf.current_load})")
+            empty = True
+            for item in self._iter_shelf_items(shelf_id):
+                empty = False
+                print(f"  - {item.sku}: {item.name} "
+                      f"(Qty: {item.quantity}, Category: {item.category})")
+            if empty:
+                print("  (Empty)")
         
         # Display summary
         status = self.get_warehouse_status()
@@ -271,32 +309,28 @@ class IntegratedWarehouse:
     
     def save_warehouse_to_db(self):
         """Save warehouse layout configuration to database."""
-        # Save warehouse config
-        lane_rows = []
-        for r in range(self.warehouse.rows):
-            if any(self.warehouse.grid[r][c].cell_type in ["lane", "lane_forward", "lane_backward"] 
-                   for c in range(self.warehouse.cols)):
-                lane_rows.append(r)
-        
+        # Save warehouse config — single pass over the grid rows
+        lane_types = {"lane", "lane_forward", "lane_backward"}
+        lane_rows = [
+            r for r, row in enumerate(self.warehouse.grid)
+            if any(cell.cell_type in lane_types for cell in row)
+        ]
+
         self.persistence.save_warehouse_config(
             self.warehouse.rows,
             self.warehouse.cols,
             lane_rows
         )
-        
-        # Save all shelves
-        for shelf in self.warehouse.shelves:
-            self.persistence.save_shelf(shelf)
-        
-        # Clear and save special nodes
-        self.persistence.delete_all_special_nodes()
-        for node in self.warehouse.special_nodes:
-            self.persistence.save_special_node(node)
+
+        # Save all shelves in one transaction
+        self.persistence.save_shelves_bulk(self.warehouse.shelves)
+
+        # Clear and save special nodes in one transaction
+        self.persistence.save_special_nodes_bulk(self.warehouse.special_nodes)
     
     def add_shelf_to_warehouse(self, shelf: ShelfLocation):
         """Add a shelf to warehouse and save to database."""
         self.warehouse.add_shelf(shelf)
-        self.shelf_lookup[shelf.id] = shelf
         self.persistence.save_shelf(shelf)
     
     def add_special_node_to_warehouse(self, node: SpecialNode):
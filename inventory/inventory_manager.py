@@ -1,14 +1,8 @@
+from bisect import bisect_left, insort
 from typing import Dict, List, Optional
 from inventory.item import Item
-import sys
-import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-try:
-    from persistence import UnifiedPersistence
-    USE_UNIFIED = True
-except ImportError:
-    from inventory.persistence import InventoryPersistence
-    USE_UNIFIED = False
+from inventory.persistence import InventoryPersistence
+from persistence import UnifiedPersistence
 
 
 class InventoryManager:
@@ -18,22 +12,74 @@ class InventoryManager:
 
     def __init__(self, db_path="warehouse.db", use_unified=True):
         # Initialize all indices first
+        # category/shelf indices map key -> {sku: Item} so removal is O(1)
+        # instead of rebuilding a list per call
         self.sku_index: Dict[str, Item] = {}
-        self.category_index: Dict[str, List[Item]] = {}
-        self.shelf_index: Dict[str, List[Item]] = {}
-        self.expiry_index: List[Item] = []
+        self.category_index: Dict[str, Dict[str, Item]] = {}
+        self.shelf_index: Dict[str, Dict[str, Item]] = {}
+        # Backing list for expiry_index, sorted lazily: bulk loads only
+        # mark it dirty and the sort runs once on first read
+        self._expiry_index: List[Item] = []
+        self._expiry_sorted: bool = True
+        # Bumped on every mutation — callers can key caches on it and
+        # skip re-reading an unchanged inventory
+        self.version: int = 0
+        # Running sum of item quantities, so the dashboards read the
+        # total in O(1) instead of summing every item per refresh
+        self._total_quantity: int = 0
 
         # Then connect to SQLite
-        if use_unified and USE_UNIFIED:
+        if use_unified:
             self.db = UnifiedPersistence(db_path)
-            # Now safely load items from DB into memory (skip_db=True to avoid duplicate saves)
-            for item in self.db.load_all_items():
-                self.add_item(item, skip_db=True)
+            items = self.db.load_all_items()
         else:
             self.db = InventoryPersistence(db_path)
-            # Now safely load items from DB into memory (skip_db=True to avoid duplicate saves)
-            for item in self.db.load_all():
-                self.add_item(item, skip_db=True)
+            items = self.db.load_all()
+
+        # Now safely load items from DB into memory without re-saving them
+        self.bulk_load(items)
+
+    @property
+    def total_quantity(self) -> int:
+        """Sum of all item quantities, maintained incrementally."""
+        return self._total_quantity
+
+    @property
+    def expiry_index(self) -> List[Item]:
+        """
+        Items with an expiry date, in expiry order. Bulk loads defer the
+        sort to this first read, so constructing a manager that nobody
+        queries for expiries never pays for the ordering.
+        """
+        if not self._expiry_sorted:
+            self._expiry_index.sort(key=lambda x: x.expiry)
+            self._expiry_sorted = True
+        return self._expiry_index
+
+    def bulk_load(self, items) -> None:
+        """
+        Load many items into the in-memory indices without touching the
+        database. Duplicated SKUs are skipped. Monotone appends (the DB
+        loaders return rows in expiry order) keep the expiry index
+        clean, so the already-sorted case skips the lazy sort entirely.
+        """
+        expiry_index = self._expiry_index
+        still_sorted = self._expiry_sorted
+        tail = expiry_index[-1].expiry if expiry_index else None
+        for item in items:
+            existing = self.sku_index.setdefault(item.sku, item)
+            if existing is not item:
+                continue
+            self.category_index.setdefault(item.category, {})[item.sku] = item
+            self.shelf_index.setdefault(item.shelf_location, {})[item.sku] = item
+            if getattr(item, "expiry", None):
+                if still_sorted and tail is not None and item.expiry < tail:
+                    still_sorted = False
+                tail = item.expiry
+                expiry_index.append(item)
+            self._total_quantity += item.quantity
+        self._expiry_sorted = still_sorted
+        self.version += 1
 
     def add_item(self, item: Item, skip_db: bool = False) -> None:
         """
@@ -43,35 +89,58 @@ class InventoryManager:
             item: Item to add
             skip_db: If True, don't save to database (used when loading from DB)
         """
-        if item.sku in self.sku_index:
+        # setdefault detects the duplicate and inserts in one hash lookup
+        existing = self.sku_index.setdefault(item.sku, item)
+        if existing is not item:
             # Don't raise error if loading from DB - just skip
             if not skip_db:
                 raise ValueError(f"Item with SKU {item.sku} already exists.")
             return
 
-        self.sku_index[item.sku] = item
-
         # Category index
-        if item.category not in self.category_index:
-            self.category_index[item.category] = []
-        self.category_index[item.category].append(item)
+        self.category_index.setdefault(item.category, {})[item.sku] = item
 
         # Shelf index
-        if item.shelf_location not in self.shelf_index:
-            self.shelf_index[item.shelf_location] = []
-        self.shelf_index[item.shelf_location].append(item)
+        self.shelf_index.setdefault(item.shelf_location, {})[item.sku] = item
 
-        # Expiry index (only for perishable goods)
+        # Expiry index (only for perishable goods) — insert in sorted
+        # position while the list is clean; a dirty list just appends
+        # and lets the lazy sort handle ordering
         if getattr(item, "expiry", None):
-            self.expiry_index.append(item)
-            self.expiry_index.sort(key=lambda x: x.expiry)
-        
+            if self._expiry_sorted:
+                insort(self._expiry_index, item, key=lambda x: x.expiry)
+            else:
+                self._expiry_index.append(item)
+
+        self._total_quantity += item.quantity
+        self.version += 1
+
         # Only save to DB if not loading from DB
         if not skip_db:
-            if USE_UNIFIED and isinstance(self.db, UnifiedPersistence):
-                self.db.save_item(item)
-            else:
-                self.db.save_item(item)
+            self.db.save_item(item)
+
+    def add_items_bulk(self, items) -> None:
+        """
+        Add many new items with a single database transaction.
+        Duplicated SKUs are skipped (as in bulk_load); indices update in
+        one pass and the expiry index defers its sort to the next read,
+        so N adds cost one fsync instead of one per item.
+        """
+        added = []
+        for item in items:
+            existing = self.sku_index.setdefault(item.sku, item)
+            if existing is not item:
+                continue
+            self.category_index.setdefault(item.category, {})[item.sku] = item
+            self.shelf_index.setdefault(item.shelf_location, {})[item.sku] = item
+            if getattr(item, "expiry", None):
+                self._expiry_index.append(item)
+                self._expiry_sorted = False
+            self._total_quantity += item.quantity
+            added.append(item)
+        if added:
+            self.version += 1
+            self.db.save_items_bulk(added)
 
     def get_by_sku(self, sku: str) -> Optional[Item]:
         """Return item by SKU."""
@@ -79,11 +148,11 @@ class InventoryManager:
 
     def get_by_category(self, category: str) -> List[Item]:
         """Return list of items in a category."""
-        return self.category_index.get(category, [])
+        return list(self.category_index.get(category, {}).values())
 
     def get_by_shelf(self, shelf: str) -> List[Item]:
         """Return list of items on a shelf."""
-        return self.shelf_index.get(shelf, [])
+        return list(self.shelf_index.get(shelf, {}).values())
 
     def remove_item(self, sku: str) -> Optional[Item]:
         """Remove item by SKU and update indices."""
@@ -91,25 +160,32 @@ class InventoryManager:
         if not item:
             return None
 
-        # Remove from category index
+        # Remove from category index (O(1) dict pop)
         if item.category in self.category_index:
-            self.category_index[item.category] = [
-                i for i in self.category_index[item.category] if i.sku != sku
-            ]
+            self.category_index[item.category].pop(sku, None)
 
-        # Remove from shelf index
+        # Remove from shelf index (O(1) dict pop)
         if item.shelf_location in self.shelf_index:
-            self.shelf_index[item.shelf_location] = [
-                i for i in self.shelf_index[item.shelf_location] if i.sku != sku
-            ]
-
-        # Remove from expiry index
-        self.expiry_index = [i for i in self.expiry_index if i.sku != sku]
-        
-        if USE_UNIFIED and isinstance(self.db, UnifiedPersistence):
-            self.db.delete_item(sku)
-        else:
-            self.db.delete_item(sku)
+            self.shelf_index[item.shelf_location].pop(sku, None)
+
+        # Remove from expiry index: a clean list is bisected to the
+        # item's expiry and only ties are scanned; a dirty list falls
+        # back to a linear remove (order is preserved either way)
+        if getattr(item, "expiry", None) and self._expiry_sorted:
+            i = bisect_left(self._expiry_index, item.expiry,
+                            key=lambda x: x.expiry)
+            while (i < len(self._expiry_index)
+                   and self._expiry_index[i].expiry == item.expiry):
+                if self._expiry_index[i] is item:
+                    del self._expiry_index[i]
+                    break
+                i += 1
+        elif item in self._expiry_index:
+            self._expiry_index.remove(item)
+
+        self._total_quantity -= item.quantity
+        self.version += 1
+        self.db.delete_item(sku)
         return item
 
     def update_item_location(self, sku: str, new_shelf: str) -> bool:
@@ -120,17 +196,16 @@ class InventoryManager:
 
         # Remove from old shelf index
         if item.shelf_location in self.shelf_index:
-            self.shelf_index[item.shelf_location] = [
-                i for i in self.shelf_index[item.shelf_location] if i.sku != sku
-            ]
+            self.shelf_index[item.shelf_location].pop(sku, None)
 
         # Update item location
         item.shelf_location = new_shelf
 
         # Add to new shelf index
         if new_shelf not in self.shelf_index:
-            self.shelf_index[new_shelf] = []
-        self.shelf_index[new_shelf].append(item)
+            self.shelf_index[new_shelf] = {}
+        self.shelf_index[new_shelf][sku] = item
+        self.version += 1
         return True
 
     def list_all_items(self) -> List[Item]:
@@ -138,13 +213,12 @@ class InventoryManager:
         return list(self.sku_index.values())
     
     def persist_snapshot(self):
-        for item in self.list_all_items():
-            self.db.save_item(item)
+        self.db.save_items_bulk(self.list_all_items())
 
     def load_snapshot(self):
-        if USE_UNIFIED and isinstance(self.db, UnifiedPersistence):
-            for item in self.db.load_all_items():
-                self.add_item(item)
+        if isinstance(self.db, UnifiedPersistence):
+            items = self.db.load_all_items()
         else:
-            for item in self.db.load_all():
-                self.add_item(item)
\ No newline at end of file
+            items = self.db.load_all()
+        for item in items:
+            self.add_item(item)
\ No newline at end of file
@@ -1,5 +1,16 @@
 from typing import Optional, Any, Dict
 import datetime
+import sys
+
+
+def _format_timestamp(dt: datetime.datetime) -> str:
+    """
+    Format dd/mm/YYYY HH:MM:SS with f-strings — avoids strftime's
+    per-call format-string parsing on bulk display paths.
+    """
+    return (f"{dt.day:02d}/{dt.month:02d}/{dt.year} "
+            f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}")
+
 
 class Item:
     """
@@ -13,6 +24,14 @@ class Item:
         arrival_time (Optional[datetime.datetime]): Arrival timestamp.
         expiry (Optional[datetime.datetime]): Expiry timestamp, if applicable.
     """
+    # No per-instance __dict__: saves ~100 bytes per Item and speeds up
+    # attribute access, which matters with thousands of SKUs in the indices
+    __slots__ = (
+        "sku", "name", "category", "shelf_location",
+        "quantity", "arrival_time", "expiry",
+        "_arrival_str", "_expiry_str"
+    )
+
     def __init__(
         self,
         sku: str,
@@ -35,11 +54,65 @@ class Item:
             raise ValueError("Expiry time must be after arrival time.")
         self.sku: str = sku
         self.name: str = name
-        self.category: str = category
-        self.shelf_location: str = shelf_location.capitalize()
+        # Categories and shelf locations repeat across many items — intern
+        # them so duplicates share one str object and dict lookups hit the
+        # identity fast path
+        self.category: str = sys.intern(category)
+        self.shelf_location: str = sys.intern(shelf_location.capitalize())
         self.quantity: int = quantity
         self.arrival_time: Optional[datetime.datetime] = arrival_time
         self.expiry: Optional[datetime.datetime] = expiry
+        self._arrival_str: Optional[str] = None
+        self._expiry_str: Optional[str] = None
+
+    @classmethod
+    def _from_db_row(
+        cls,
+        sku: str,
+        name: str,
+        category: str,
+        shelf_location: str,
+        quantity: int,
+        arrival_time: Optional[datetime.datetime],
+        expiry: Optional[datetime.datetime]
+    ) -> "Item":
+        """
+        Fast constructor for rows loaded from the database.
+
+        Skips the validation in __init__ (the data was validated before it
+        was saved) and the shelf_location normalization (already stored
+        normalized).
+        """
+        item = object.__new__(cls)
+        item.sku = sku
+        item.name = name
+        item.category = sys.intern(category)
+        item.shelf_location = sys.intern(shelf_location)
+        item.quantity = quantity
+        item.arrival_time = arrival_time
+        item.expiry = expiry
+        item._arrival_str = None
+        item._expiry_str = None
+        return item
+
+    @property
+    def arrival_str(self) -> str:
+        """Arrival time as dd/mm/YYYY HH:MM:SS, cached on first access."""
+        if self._arrival_str is None:
+            self._arrival_str = (
+                _format_timestamp(self.arrival_time)
+                if self.arrival_time else "N/A"
+            )
+        return self._arrival_str
+
+    @property
+    def expiry_str(self) -> str:
+        """Expiry time as dd/mm/YYYY HH:MM:SS, cached on first access."""
+        if self._expiry_str is None:
+            self._expiry_str = (
+                _format_timestamp(self.expiry) if self.expiry else "N/A"
+            )
+        return self._expiry_str
 
     def __repr__(self) -> str:
         return f"SKU={self.sku}, Name={self.name}, Qty={self.quantity}, Shelf={self.shelf_location}, Expiry={self.expiry.strftime('%Y-%m-%d %H:%M:%S')}"
@@ -6,10 +6,31 @@ from datetime import datetime
 class InventoryPersistence:
     """
     Handles saving and loading inventory data using SQLite.
+
+    The connection is opened once in autocommit mode with WAL journaling, so
+    single-row writes no longer pay a full fsync each. Callers doing bulk work
+    can wrap a group of operations in begin()/commit() (or use the instance as
+    a context manager) to collapse them into one transaction.
+    """
+    # SQL kept as constants so SQLite's statement cache can reuse the
+    # parsed/planned statement instead of re-parsing it on every call
+    _INSERT_SQL = """
+    INSERT OR REPLACE INTO inventory
+    (sku, name, category, shelf_location, quantity, arrival_time, expiry)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
     """
+    _DELETE_SQL = "DELETE FROM inventory WHERE sku = ?"
+
     def __init__(self, db_path="inventory.db"):
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path)
+        # isolation_level=None -> autocommit; explicit BEGIN/COMMIT for batches
+        self.conn = sqlite3.connect(self.db_path, isolation_level=None)
+        # Performance PRAGMAs: WAL avoids fsync-per-write, NORMAL sync is safe
+        # in WAL mode, temp tables and a larger page cache stay in memory
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-20000")
         self.create_table()
 
     def create_table(self):
@@ -26,46 +47,83 @@ class InventoryPersistence:
             expiry TEXT
         )
         """)
+        # Secondary indexes so category/shelf queries don't full-scan
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS ix_inventory_shelf ON inventory(shelf_location)
+        """)
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS ix_inventory_category ON inventory(category)
+        """)
+
+    def begin(self):
+        """Start an explicit transaction for a batch of writes."""
+        self.conn.execute("BEGIN")
+
+    def commit(self):
+        """Commit the current explicit transaction."""
         self.conn.commit()
 
-    def save_item(self, item: Item):
-        """Insert or replace an item into the database."""
-        cur = self.conn.cursor()
-        cur.execute("""
-        INSERT OR REPLACE INTO inventory
-        (sku, name, category, shelf_location, quantity, arrival_time, expiry)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
+    @staticmethod
+    def _row(item: Item):
+        """Build the parameter tuple for an inventory INSERT."""
+        return (
             item.sku, item.name, item.category, item.shelf_location,
             item.quantity,
-            str(item.arrival_time) if item.arrival_time else None,
-            str(item.expiry) if item.expiry else None
-        ))
-        self.conn.commit()
+            item.arrival_time.isoformat() if item.arrival_time else None,
+            item.expiry.isoformat() if item.expiry else None
+        )
+
+    def save_item(self, item: Item):
+        """Insert or replace an item into the database."""
+        self.conn.execute(self._INSERT_SQL, self._row(item))
+
+    def save_items_bulk(self, items):
+        """Insert or replace many items in a single transaction."""
+        with self:
+            self.conn.executemany(self._INSERT_SQL, (self._row(i) for i in items))
+        # Refresh planner statistics after a bulk load so the indexes are used
+        self.conn.execute("ANALYZE")
 
     def delete_item(self, sku: str):
         """Delete an item by SKU."""
-        cur = self.conn.cursor()
-        cur.execute("DELETE FROM inventory WHERE sku = ?", (sku,))
-        self.conn.commit()
+        self.conn.execute(self._DELETE_SQL, (sku,))
 
     def load_all(self) -> List[Item]:
         """Load all items from database."""
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM inventory")
-        rows = cur.fetchall()
-        items = []
-        for r in rows:
-            items.append(Item(
-                sku=r[0],
-                name=r[1],
-                category=r[2],
-                shelf_location=r[3],
-                quantity=r[4],
-                arrival_time=datetime.fromisoformat(r[5]) if r[5] else None,
-                expiry=datetime.fromisoformat(r[6]) if r[6] else None
-            ))
-        return items
+        # Expiry-ordered (NULLs last) so the in-memory expiry index can
+        # detect the rows as already sorted and skip its sort
+        cur = self.conn.execute(
+            "SELECT * FROM inventory ORDER BY expiry IS NULL, expiry")
+
+        # Timestamp strings repeat heavily (same delivery/expiry batches), so
+        # cache parsed datetimes instead of re-parsing per row
+        dt_cache = {}
+
+        def _parse(s):
+            if not s:
+                return None
+            dt = dt_cache.get(s)
+            if dt is None:
+                dt = datetime.fromisoformat(s)
+                dt_cache[s] = dt
+            return dt
+
+        # Iterate the cursor directly (no fetchall materialization) and use
+        # the validation-free row constructor for DB-trusted data
+        return [
+            Item._from_db_row(r[0], r[1], r[2], r[3], r[4], _parse(r[5]), _parse(r[6]))
+            for r in cur
+        ]
 
     def close(self):
-        self.conn.close()
\ No newline at end of file
+        self.conn.close()
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.conn.rollback()
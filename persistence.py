@@ -4,12 +4,44 @@ Handles both inventory and warehouse layout data in a single SQLite database.
 """
 import sqlite3
 import json
+import queue
+import threading
+from contextlib import contextmanager
+from functools import wraps
 from typing import List, Optional, Dict, Tuple
 from inventory.item import Item
 from warehouse.models import ShelfLocation, SpecialNode
 from datetime import datetime
 
 
+# Timestamp strings repeat heavily across rows (items arrive/expire in
+# batches), so parsed datetimes are cached instead of re-parsed per row
+_dt_cache: Dict[str, datetime] = {}
+
+
+def _parse_dt(s: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO timestamp with memoization; None passes through."""
+    if not s:
+        return None
+    dt = _dt_cache.get(s)
+    if dt is None:
+        dt = datetime.fromisoformat(s)
+        _dt_cache[s] = dt
+    return dt
+
+
+def _with_retry(fn):
+    """Retry a persistence method once after reconnecting the writer."""
+    @wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return fn(self, *args, **kwargs)
+        except (sqlite3.ProgrammingError, sqlite3.OperationalError):
+            self._reconnect()
+            return fn(self, *args, **kwargs)
+    return wrapper
+
+
 class UnifiedPersistence:
     """
     Unified persistence layer for inventory and warehouse data.
@@ -24,22 +56,73 @@ class UnifiedPersistence:
             db_path: Path to SQLite database file
         """
         self.db_path = db_path
-        # Allow connections from different threads (needed for Streamlit)
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Allow connections from different threads (needed for Streamlit).
+        # A larger statement cache lets sqlite3 reuse prepared statements
+        # for the recurring INSERT/UPDATE/DELETE texts instead of re-parsing
+        self.conn = sqlite3.connect(
+            db_path, check_same_thread=False, cached_statements=512
+        )
         self.conn.row_factory = sqlite3.Row  # Enable column access by name
-        # Enable WAL mode for better concurrency
-        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._apply_pragmas()
         self.create_tables()
+
+        # WAL allows many concurrent readers alongside the single writer, so
+        # dashboard reads go through a small pool of read-only connections
+        # instead of contending on the writer's mutex
+        self._write_lock = threading.Lock()
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(self._READER_POOL_SIZE):
+            self._readers.put(self._open_reader())
+
+    def _apply_pragmas(self):
+        """Apply performance PRAGMAs to a fresh connection."""
+        # WAL mode for better concurrency; synchronous=NORMAL is durable
+        # under WAL (a crash can only lose the very last transaction).
+        # Larger cache, in-memory temp tables and mmap'd reads avoid
+        # syscalls on the hot read paths.
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-64000;
+            PRAGMA mmap_size=268435456;
+            PRAGMA foreign_keys=ON;
+        """)
     
+    _READER_POOL_SIZE = 3
+
+    def _open_reader(self) -> sqlite3.Connection:
+        """Open a read-only connection for concurrent dashboard reads."""
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True,
+            check_same_thread=False, cached_statements=512
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _get_reader(self):
+        """Borrow a read-only connection from the pool."""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._open_reader()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
     def _reconnect(self):
         """Reconnect to database if connection is lost."""
         try:
             self.conn.close()
         except:
             pass
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, cached_statements=512
+        )
         self.conn.row_factory = sqlite3.Row
-        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._apply_pragmas()
     
     def create_tables(self):
         """Create all necessary tables for inventory and warehouse data."""
@@ -91,85 +174,89 @@ class UnifiedPersistence:
         """)
         
         # Create indexes for better performance
+        # Covering index: sync_shelf_loads sums quantity per shelf, and
+        # including quantity lets SQLite answer it from the index alone
         cur.execute("""
-        CREATE INDEX IF NOT EXISTS idx_inventory_shelf ON inventory(shelf_location)
+        CREATE INDEX IF NOT EXISTS idx_inventory_shelf_qty ON inventory(shelf_location, quantity)
         """)
         cur.execute("""
         CREATE INDEX IF NOT EXISTS idx_inventory_category ON inventory(category)
         """)
+        # Superseded by idx_inventory_shelf_qty, which covers the same prefix
+        cur.execute("DROP INDEX IF EXISTS idx_inventory_shelf")
         
         self.conn.commit()
     
     # ========== INVENTORY METHODS ==========
-    
+
+    # Keep the SQL as constants so the sqlite3 statement cache reuses the
+    # parsed statement instead of re-parsing the text on every call
+    _INSERT_ITEM_SQL = """
+    INSERT OR REPLACE INTO inventory
+    (sku, name, category, shelf_location, quantity, arrival_time, expiry)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+    _DELETE_ITEM_SQL = "DELETE FROM inventory WHERE sku = ?"
+
+    @staticmethod
+    def _item_row(item: Item) -> Tuple:
+        """Build the parameter tuple for an inventory INSERT."""
+        return (
+            item.sku, item.name, item.category, item.shelf_location,
+            item.quantity,
+            item.arrival_time.isoformat() if item.arrival_time else None,
+            item.expiry.isoformat() if item.expiry else None
+        )
+
     def save_item(self, item: Item):
         """Insert or replace an item into the database."""
-        # Use a lock or ensure thread safety
-        try:
-            cur = self.conn.cursor()
-            cur.execute("""
-            INSERT OR REPLACE INTO inventory
-            (sku, name, category, shelf_location, quantity, arrival_time, expiry)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                item.sku, item.name, item.category, item.shelf_location,
-                item.quantity,
-                item.arrival_time.isoformat() if item.arrival_time else None,
-                item.expiry.isoformat() if item.expiry else None
-            ))
-            self.conn.commit()
-        except (sqlite3.ProgrammingError, sqlite3.OperationalError):
-            # If connection is closed or thread issue, reconnect
-            self._reconnect()
-            cur = self.conn.cursor()
-            cur.execute("""
-            INSERT OR REPLACE INTO inventory
-            (sku, name, category, shelf_location, quantity, arrival_time, expiry)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                item.sku, item.name, item.category, item.shelf_location,
-                item.quantity,
-                item.arrival_time.isoformat() if item.arrival_time else None,
-                item.expiry.isoformat() if item.expiry else None
-            ))
-            self.conn.commit()
-    
+        self.save_items_bulk([item])
+
+    @_with_retry
+    def save_items_bulk(self, items: List[Item]):
+        """Insert or replace many items in a single transaction."""
+        rows = [self._item_row(i) for i in items]
+        if not rows:
+            return
+        with self._write_lock, self.conn:
+            self.conn.executemany(self._INSERT_ITEM_SQL, rows)
+
+    @_with_retry
     def delete_item(self, sku: str):
         """Delete an item by SKU."""
-        try:
-            cur = self.conn.cursor()
-            cur.execute("DELETE FROM inventory WHERE sku = ?", (sku,))
-            self.conn.commit()
-        except sqlite3.ProgrammingError:
-            self._reconnect()
-            cur = self.conn.cursor()
-            cur.execute("DELETE FROM inventory WHERE sku = ?", (sku,))
-            self.conn.commit()
+        cur = self.conn.cursor()
+        cur.execute(self._DELETE_ITEM_SQL, (sku,))
+        self.conn.commit()
     
+    @staticmethod
+    def _item_from_row(r) -> Item:
+        """Build an Item from an inventory row (validation-free, cached dates)."""
+        return Item._from_db_row(
+            r['sku'], r['name'], r['category'], r['shelf_location'],
+            r['quantity'], _parse_dt(r['arrival_time']), _parse_dt(r['expiry'])
+        )
+
+    def iter_items(self):
+        """
+        Yield items lazily in fetchmany batches, so callers never hold the
+        raw row buffer and the Item list in memory at the same time.
+        """
+        with self._get_reader() as conn:
+            cur = conn.cursor()
+            cur.arraysize = 1000
+            # Expiry-ordered (NULLs last) so the in-memory expiry index
+            # can detect the rows as already sorted and skip its sort
+            cur.execute("SELECT * FROM inventory ORDER BY expiry IS NULL, expiry")
+            while True:
+                batch = cur.fetchmany()
+                if not batch:
+                    break
+                for r in batch:
+                    yield self._item_from_row(r)
+
     def load_all_items(self) -> List[Item]:
         """Load all items from database."""
-        try:
-            cur = self.conn.cursor()
-            cur.execute("SELECT * FROM inventory")
-            rows = cur.fetchall()
-        except (sqlite3.ProgrammingError, sqlite3.OperationalError):
-            self._reconnect()
-            cur = self.conn.cursor()
-            cur.execute("SELECT * FROM inventory")
-            rows = cur.fetchall()
-        
-        items = []
-        for r in rows:
-            items.append(Item(
-                sku=r['sku'],
-                name=r['name'],
-                category=r['category'],
-                shelf_location=r['shelf_location'],
-                quantity=r['quantity'],
-                arrival_time=datetime.fromisoformat(r['arrival_time']) if r['arrival_time'] else None,
-                expiry=datetime.fromisoformat(r['expiry']) if r['expiry'] else None
-            ))
-        return items
+        return list(self.iter_items())
     
     # ========== WAREHOUSE CONFIGURATION METHODS ==========
     
@@ -198,10 +285,9 @@ class UnifiedPersistence:
         Returns:
             Tuple of (rows, cols, lane_rows) or None if not configured
         """
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM warehouse_config WHERE id = 1")
-        row = cur.fetchone()
-        
+        with self._get_reader() as conn:
+            row = conn.execute("SELECT * FROM warehouse_config WHERE id = 1").fetchone()
+
         if row:
             lane_rows = json.loads(row['lane_rows']) if row['lane_rows'] else []
             return (row['rows'], row['cols'], lane_rows)
@@ -211,24 +297,23 @@ class UnifiedPersistence:
     
     def save_shelf(self, shelf: ShelfLocation):
         """Insert or replace a shelf in the database."""
-        try:
-            cur = self.conn.cursor()
-            r, c = shelf.coordinates
-            cur.execute("""
-            INSERT OR REPLACE INTO shelves (id, row, col, capacity, current_load)
-            VALUES (?, ?, ?, ?, ?)
-            """, (shelf.id, r, c, shelf.capacity, shelf.current_load))
-            self.conn.commit()
-        except (sqlite3.ProgrammingError, sqlite3.OperationalError):
-            self._reconnect()
-            cur = self.conn.cursor()
-            r, c = shelf.coordinates
-            cur.execute("""
+        self.save_shelves_bulk([shelf])
+    
+    @_with_retry
+    def save_shelves_bulk(self, shelves: List[ShelfLocation]):
+        """Insert or replace many shelves in a single transaction."""
+        rows = [
+            (s.id, s.coordinates[0], s.coordinates[1], s.capacity, s.current_load)
+            for s in shelves
+        ]
+        if not rows:
+            return
+        with self._write_lock, self.conn:
+            self.conn.executemany("""
             INSERT OR REPLACE INTO shelves (id, row, col, capacity, current_load)
             VALUES (?, ?, ?, ?, ?)
-            """, (shelf.id, r, c, shelf.capacity, shelf.current_load))
-            self.conn.commit()
-    
+            """, rows)
+
     def delete_shelf(self, shelf_id: str):
         """Delete a shelf by ID."""
         cur = self.conn.cursor()
@@ -237,9 +322,8 @@ class UnifiedPersistence:
     
     def load_all_shelves(self) -> List[ShelfLocation]:
         """Load all shelves from database."""
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM shelves")
-        rows = cur.fetchall()
+        with self._get_reader() as conn:
+            rows = conn.execute("SELECT * FROM shelves").fetchall()
         shelves = []
         for r in rows:
             shelves.append(ShelfLocation(
@@ -250,35 +334,57 @@ class UnifiedPersistence:
             ))
         return shelves
     
+    @_with_retry
+    def update_shelf_loads_bulk(self, loads: Dict[str, int]):
+        """
+        Update the current load of many shelves in a single transaction.
+
+        Args:
+            loads: Mapping of shelf_id -> current_load
+        """
+        if not loads:
+            return
+        with self._write_lock, self.conn:
+            self.conn.executemany("""
+            UPDATE shelves SET current_load = ? WHERE id = ?
+            """, [(load, shelf_id) for shelf_id, load in loads.items()])
+
+    @_with_retry
     def update_shelf_load(self, shelf_id: str, current_load: int):
         """Update the current load of a shelf."""
-        try:
-            cur = self.conn.cursor()
-            cur.execute("""
-            UPDATE shelves SET current_load = ? WHERE id = ?
-            """, (current_load, shelf_id))
-            self.conn.commit()
-        except (sqlite3.ProgrammingError, sqlite3.OperationalError):
-            self._reconnect()
-            cur = self.conn.cursor()
-            cur.execute("""
-            UPDATE shelves SET current_load = ? WHERE id = ?
-            """, (current_load, shelf_id))
-            self.conn.commit()
+        cur = self.conn.cursor()
+        cur.execute("""
+        UPDATE shelves SET current_load = ? WHERE id = ?
+        """, (current_load, shelf_id))
+        self.conn.commit()
     
     # ========== SPECIAL NODE METHODS ==========
     
+    _INSERT_NODE_SQL = """
+    INSERT INTO special_nodes (node_type, row, col)
+    VALUES (?, ?, ?)
+    """
+
     def save_special_node(self, node: SpecialNode):
-        """Insert a special node into the database."""
-        cur = self.conn.cursor()
+        """Insert a special node into the database; returns its row id."""
         r, c = node.coordinates
-        cur.execute("""
-        INSERT INTO special_nodes (node_type, row, col)
-        VALUES (?, ?, ?)
-        """, (node.node_type, r, c))
-        self.conn.commit()
+        with self._write_lock, self.conn:
+            cur = self.conn.execute(self._INSERT_NODE_SQL, (node.node_type, r, c))
         return cur.lastrowid
-    
+
+    def save_special_nodes(self, nodes: List[SpecialNode]):
+        """Append many special nodes under a single transaction."""
+        rows = [(n.node_type, n.coordinates[0], n.coordinates[1]) for n in nodes]
+        with self._write_lock, self.conn:
+            self.conn.executemany(self._INSERT_NODE_SQL, rows)
+
+    def save_special_nodes_bulk(self, nodes: List[SpecialNode]):
+        """Replace all special nodes with the given list in one transaction."""
+        rows = [(n.node_type, n.coordinates[0], n.coordinates[1]) for n in nodes]
+        with self._write_lock, self.conn:
+            self.conn.execute("DELETE FROM special_nodes")
+            self.conn.executemany(self._INSERT_NODE_SQL, rows)
+
     def delete_all_special_nodes(self):
         """Delete all special nodes (used when reloading warehouse)."""
         cur = self.conn.cursor()
@@ -287,9 +393,8 @@ class UnifiedPersistence:
     
     def load_all_special_nodes(self) -> List[SpecialNode]:
         """Load all special nodes from database."""
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM special_nodes")
-        rows = cur.fetchall()
+        with self._get_reader() as conn:
+            rows = conn.execute("SELECT * FROM special_nodes").fetchall()
         nodes = []
         for r in rows:
             nodes.append(SpecialNode(
@@ -305,64 +410,57 @@ class UnifiedPersistence:
         Sync shelf current_load values with actual inventory quantities.
         This ensures database consistency.
         """
-        cur = self.conn.cursor()
-        
-        # Get all shelves
-        cur.execute("SELECT id FROM shelves")
-        shelves = [row['id'] for row in cur.fetchall()]
-        
-        # Calculate actual load for each shelf from inventory
-        for shelf_id in shelves:
-            cur.execute("""
-                SELECT COALESCE(SUM(quantity), 0) as total
-                FROM inventory
-                WHERE shelf_location = ?
-            """, (shelf_id,))
-            result = cur.fetchone()
-            total_quantity = result['total'] if result else 0
-            
-            # Update shelf load
-            cur.execute("""
-                UPDATE shelves SET current_load = ? WHERE id = ?
-            """, (total_quantity, shelf_id))
-        
-        self.conn.commit()
+        # One correlated UPDATE computes and applies every shelf load
+        # server-side — no per-shelf round-trips through Python at all
+        with self._write_lock, self.conn:
+            self.conn.execute("""
+                UPDATE shelves SET current_load = COALESCE(
+                    (SELECT SUM(quantity) FROM inventory
+                     WHERE inventory.shelf_location = shelves.id), 0)
+            """)
     
     def get_database_stats(self) -> Dict:
         """Get statistics about the database contents."""
-        cur = self.conn.cursor()
-        
-        stats = {}
-        
-        # Inventory stats
-        cur.execute("SELECT COUNT(*) as count, SUM(quantity) as total_qty FROM inventory")
-        inv_row = cur.fetchone()
-        stats['inventory'] = {
-            'item_count': inv_row['count'] if inv_row else 0,
-            'total_quantity': inv_row['total_qty'] if inv_row and inv_row['total_qty'] else 0
-        }
-        
-        # Shelf stats
-        cur.execute("SELECT COUNT(*) as count, SUM(capacity) as total_cap, SUM(current_load) as total_load FROM shelves")
-        shelf_row = cur.fetchone()
-        stats['shelves'] = {
-            'shelf_count': shelf_row['count'] if shelf_row else 0,
-            'total_capacity': shelf_row['total_cap'] if shelf_row and shelf_row['total_cap'] else 0,
-            'total_load': shelf_row['total_load'] if shelf_row and shelf_row['total_load'] else 0
-        }
-        
-        # Special nodes stats
-        cur.execute("SELECT COUNT(*) as count FROM special_nodes")
-        node_row = cur.fetchone()
-        stats['special_nodes'] = {
-            'node_count': node_row['count'] if node_row else 0
+        with self._get_reader() as conn:
+            cur = conn.cursor()
+            return self._collect_stats(cur)
+
+    @staticmethod
+    def _collect_stats(cur) -> Dict:
+        # One round-trip: all aggregates as scalar subqueries in a single row
+        cur.execute("""
+            SELECT (SELECT COUNT(*) FROM inventory) AS item_count,
+                   (SELECT SUM(quantity) FROM inventory) AS total_qty,
+                   (SELECT COUNT(*) FROM shelves) AS shelf_count,
+                   (SELECT SUM(capacity) FROM shelves) AS total_cap,
+                   (SELECT SUM(current_load) FROM shelves) AS total_load,
+                   (SELECT COUNT(*) FROM special_nodes) AS node_count
+        """)
+        row = cur.fetchone()
+
+        return {
+            'inventory': {
+                'item_count': row['item_count'],
+                'total_quantity': row['total_qty'] or 0
+            },
+            'shelves': {
+                'shelf_count': row['shelf_count'],
+                'total_capacity': row['total_cap'] or 0,
+                'total_load': row['total_load'] or 0
+            },
+            'special_nodes': {
+                'node_count': row['node_count']
+            }
         }
-        
-        return stats
     
     def close(self):
-        """Close the database connection."""
+        """Close the writer and all pooled reader connections."""
         self.conn.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
     
     def __enter__(self):
         """Context manager entry."""
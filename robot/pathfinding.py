@@ -2,29 +2,133 @@
 Pathfinding algorithms for robot navigation in warehouse.
 Uses A* algorithm for optimal pathfinding.
 """
-import heapq
-from typing import List, Tuple, Optional, Dict, Set
-from dataclasses import dataclass
-
-
-@dataclass
-class Node:
-    """Represents a node in the pathfinding graph."""
-    row: int
-    col: int
-    g_cost: float = 0  # Distance from start
-    h_cost: float = 0  # Heuristic distance to goal
-    f_cost: float = 0  # Total cost (g + h)
-    parent: Optional['Node'] = None
-    
-    def __lt__(self, other):
-        return self.f_cost < other.f_cost
-    
-    def __eq__(self, other):
-        return self.row == other.row and self.col == other.col
-    
-    def __hash__(self):
-        return hash((self.row, self.col))
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Tuple, Optional
+
+import numpy as np
+
+# Numba is optional: when present the A* inner loop runs JIT-compiled over
+# the passable-cell grid, otherwise the pure-Python loop below is used
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Cell types robots can traverse (shelves are only accessed from the side)
+PASSABLE_CELL_TYPES = frozenset([
+    "lane", "lane_forward", "lane_backward", "free", "dock", "packing", "truck_bay"
+])
+
+# Cell types that count as shelf access points
+ACCESS_CELL_TYPES = frozenset(["lane", "free", "dock"])
+
+
+def _astar_core(passable, sr, sc, gr, gc):
+    """
+    A* over a uint8 passable grid with a manual array-based binary heap
+    (stdlib heapq is unavailable under nopython mode). Returns an (N, 2)
+    int32 array of (row, col) steps, empty if no path exists.
+    """
+    rows, cols = passable.shape
+    n = rows * cols
+    g = np.full(n, np.inf, dtype=np.float32)
+    parent = np.full(n, -1, dtype=np.int32)
+    closed = np.zeros(n, dtype=np.uint8)
+
+    # Each edge relaxation pushes at most once -> 4n bounds the heap
+    cap = 4 * n + 4
+    heap_f = np.zeros(cap, dtype=np.float32)
+    heap_i = np.zeros(cap, dtype=np.int32)
+
+    start_idx = sr * cols + sc
+    goal_idx = gr * cols + gc
+    g[start_idx] = 0.0
+    heap_f[0] = abs(sr - gr) + abs(sc - gc)
+    heap_i[0] = start_idx
+    size = 1
+
+    while size > 0:
+        idx = heap_i[0]
+        # Pop root: move last entry up and sift down
+        size -= 1
+        heap_f[0] = heap_f[size]
+        heap_i[0] = heap_i[size]
+        pos = 0
+        while True:
+            left = 2 * pos + 1
+            right = left + 1
+            smallest = pos
+            if left < size and heap_f[left] < heap_f[smallest]:
+                smallest = left
+            if right < size and heap_f[right] < heap_f[smallest]:
+                smallest = right
+            if smallest == pos:
+                break
+            heap_f[pos], heap_f[smallest] = heap_f[smallest], heap_f[pos]
+            heap_i[pos], heap_i[smallest] = heap_i[smallest], heap_i[pos]
+            pos = smallest
+
+        if closed[idx] == 1:
+            continue
+        closed[idx] = 1
+
+        if idx == goal_idx:
+            # Reconstruct path by walking parents backward
+            length = 0
+            j = idx
+            while j != -1:
+                length += 1
+                j = parent[j]
+            out = np.empty((length, 2), dtype=np.int32)
+            j = idx
+            for k in range(length - 1, -1, -1):
+                out[k, 0] = j // cols
+                out[k, 1] = j % cols
+                j = parent[j]
+            return out
+
+        r0 = idx // cols
+        c0 = idx % cols
+        for d in range(4):
+            if d == 0:
+                nr, nc = r0, c0 + 1
+            elif d == 1:
+                nr, nc = r0 + 1, c0
+            elif d == 2:
+                nr, nc = r0, c0 - 1
+            else:
+                nr, nc = r0 - 1, c0
+            if nr < 0 or nr >= rows or nc < 0 or nc >= cols:
+                continue
+            if passable[nr, nc] == 0:
+                continue
+            nidx = nr * cols + nc
+            if closed[nidx] == 1:
+                continue
+            tentative_g = g[idx] + 1.0
+            if tentative_g < g[nidx]:
+                g[nidx] = tentative_g
+                parent[nidx] = idx
+                # Push with sift up
+                heap_f[size] = tentative_g + abs(nr - gr) + abs(nc - gc)
+                heap_i[size] = nidx
+                pos = size
+                size += 1
+                while pos > 0:
+                    par = (pos - 1) // 2
+                    if heap_f[par] <= heap_f[pos]:
+                        break
+                    heap_f[pos], heap_f[par] = heap_f[par], heap_f[pos]
+                    heap_i[pos], heap_i[par] = heap_i[par], heap_i[pos]
+                    pos = par
+
+    return np.empty((0, 2), dtype=np.int32)
+
+
+if NUMBA_AVAILABLE:
+    _astar_core = njit(cache=True)(_astar_core)
 
 
 class Pathfinder:
@@ -38,15 +142,68 @@ class Pathfinder:
             warehouse: Warehouse instance with grid layout
         """
         self.warehouse = warehouse
-    
-    def _heuristic(self, node1: Tuple[int, int], node2: Tuple[int, int]) -> float:
+        self._passable: Optional[np.ndarray] = None
+        # Layout version: cached paths are keyed on it, so bumping it
+        # retires every path computed on the old grid. _sync_layout
+        # bumps it automatically whenever the warehouse's own
+        # layout_version moves, so grid mutations after construction
+        # can never serve stale paths
+        self.version = 0
+        self._layout_version = warehouse.layout_version
+        # Manhattan-distance field for the current goal, flattened to
+        # linear indices; rebuilt only when the goal changes
+        self._h_cache: Optional[List[int]] = None
+        self._h_goal: Optional[Tuple[int, int]] = None
+        # Per-instance cache so entries die with the pathfinder
+        self._search_cached = lru_cache(maxsize=2048)(self._search)
+
+    @property
+    def passable(self) -> np.ndarray:
+        """
+        Cached uint8 grid of traversable cells. Built lazily on first
+        use and rebuilt automatically after warehouse layout changes.
+        """
+        self._sync_layout()
+        if self._passable is None:
+            self._passable = np.array([
+                [cell.cell_type in PASSABLE_CELL_TYPES for cell in row]
+                for row in self.warehouse.grid
+            ], dtype=np.uint8)
+        return self._passable
+
+    def _sync_layout(self):
+        """Invalidate cached grid data if the warehouse layout moved."""
+        if self._layout_version != self.warehouse.layout_version:
+            self._layout_version = self.warehouse.layout_version
+            self.invalidate()
+
+    def invalidate(self):
+        """Drop cached grid data after a warehouse layout change."""
+        self._passable = None
+        self.version += 1
+
+    def _goal_heuristic(self, gr: int, gc: int) -> List[int]:
+        """
+        Manhattan distance to (gr, gc) for every cell, indexed by
+        row * cols + col. Built with one NumPy broadcast and kept as a
+        plain list so the search loop reads native ints; successive
+        searches to the same goal (the common shelf/dock case) reuse it.
+        """
+        if self._h_goal != (gr, gc):
+            row_d = np.abs(np.arange(self.warehouse.rows) - gr)
+            col_d = np.abs(np.arange(self.warehouse.cols) - gc)
+            self._h_cache = (row_d[:, None] + col_d[None, :]).ravel().tolist()
+            self._h_goal = (gr, gc)
+        return self._h_cache
+
+    def _heuristic(self, node1: Tuple[int, int], node2: Tuple[int, int]) -> int:
         """
         Manhattan distance heuristic for A* algorithm.
-        
+
         Args:
             node1: (row, col) of first node
             node2: (row, col) of second node
-            
+
         Returns:
             Manhattan distance between nodes
         """
@@ -67,40 +224,32 @@ class Pathfinder:
         """
         neighbors = []
         directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]  # Right, Down, Left, Up
-        
+        passable = self.passable
+        rows, cols = passable.shape
+
         for dr, dc in directions:
             new_row, new_col = row + dr, col + dc
-            
-            if not self.warehouse._in_bounds(new_row, new_col):
-                continue
-            
-            cell = self.warehouse.grid[new_row][new_col]
-            cell_type = cell.cell_type
-            
-            # Robots can move through: lanes (all types), free space, docks, packing areas, truck bays
-            # Cannot move through: shelves (unless accessing from side)
-            if cell_type in ["lane", "lane_forward", "lane_backward", "free", "dock", "packing", "truck_bay"]:
+
+            # Direct array lookup replaces the per-cell string comparison
+            if 0 <= new_row < rows and 0 <= new_col < cols and passable[new_row, new_col]:
                 neighbors.append((new_row, new_col))
-            elif cell_type == "shelf":
-                # Can move adjacent to shelves but not through them
-                pass
-        
+
         return neighbors
     
-    def _get_cost(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int]) -> float:
+    def _get_cost(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int]) -> int:
         """
         Get movement cost between two adjacent positions.
-        
+
         Args:
             from_pos: Starting position (row, col)
             to_pos: Destination position (row, col)
-            
+
         Returns:
-            Movement cost (1.0 for normal, higher for difficult terrain)
+            Movement cost (1 for normal, higher for difficult terrain)
         """
         # For now, all movements cost 1
         # Can be extended for different terrain types
-        return 1.0
+        return 1
     
     def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
         """
@@ -116,7 +265,7 @@ class Pathfinder:
         if not self.warehouse._in_bounds(start[0], start[1]) or \
            not self.warehouse._in_bounds(goal[0], goal[1]):
             return None
-        
+
         # Check if goal is reachable (not a shelf)
         goal_cell = self.warehouse.grid[goal[0]][goal[1]]
         if goal_cell.cell_type == "shelf":
@@ -124,58 +273,113 @@ class Pathfinder:
             goal = self._find_nearest_accessible(goal)
             if goal is None:
                 return None
-        
-        start_node = Node(start[0], start[1])
-        goal_node = Node(goal[0], goal[1])
-        
-        open_set: List[Node] = []
-        heapq.heappush(open_set, start_node)
-        closed_set: Set[Tuple[int, int]] = set()
-        node_map: Dict[Tuple[int, int], Node] = {(start[0], start[1]): start_node}
-        
-        while open_set:
-            current = heapq.heappop(open_set)
-            
-            if (current.row, current.col) in closed_set:
+
+        # Robots repeatedly path between the same dock/shelf pairs, so
+        # the actual search is memoized per (start, goal, layout version)
+        self._sync_layout()
+        path = self._search_cached(start[0], start[1], goal[0], goal[1], self.version)
+        if path is None:
+            return None
+        return list(path)
+
+    def _search(self, sr: int, sc: int, gr: int, gc: int,
+                version: int) -> Optional[Tuple[Tuple[int, int], ...]]:
+        """
+        Run the A* search itself. Returns the path as a tuple of (row, col)
+        pairs so cached results are hashable and safely shareable between
+        callers; `version` only exists to partition the cache by layout.
+        """
+        start = (sr, sc)
+        goal = (gr, gc)
+
+        # With Numba available, run the whole search JIT-compiled over the
+        # passable grid — no interpreter dispatch per expansion
+        if NUMBA_AVAILABLE:
+            steps = _astar_core(self.passable, sr, sc, gr, gc)
+            if steps.shape[0] == 0:
+                return None
+            return tuple((int(r), int(c)) for r, c in steps)
+
+        # Structure-of-arrays search state: flat arrays indexed by
+        # row * cols + col instead of per-cell node objects
+        # Hot-loop specialization: bind grid data and goal to locals so the
+        # expansion loop runs on LOAD_FASTs instead of attribute lookups
+        # and method calls per neighbor
+        rows = self.warehouse.rows
+        cols = self.warehouse.cols
+        passable = self.passable
+        n = rows * cols
+        # Unit edge costs keep every g/f value a small integer — integer
+        # compares are cheaper than float and feed the bucket keys directly
+        unreached = n + 1
+        g_cost = np.full(n, unreached, dtype=np.int32)
+        parent = np.full(n, -1, dtype=np.int32)
+        closed = np.zeros(n, dtype=bool)
+
+        start_idx = start[0] * cols + start[1]
+        goal_idx = goal[0] * cols + goal[1]
+        g_cost[start_idx] = 0
+
+        # All edge costs are unit, so f values are small integers and a
+        # bucket queue (deque per f_cost) gives O(1) pops instead of the
+        # O(log n) heap. Manhattan is consistent, so popped f never
+        # decreases and current_f only needs to move forward.
+        # Precomputed per-goal heuristic field — no abs() arithmetic in
+        # the relaxation path, just a list index
+        h = self._goal_heuristic(gr, gc)
+
+        buckets: Dict[int, deque] = {}
+        current_f = h[start_idx]
+        buckets[current_f] = deque((start_idx,))
+        open_count = 1
+
+        while open_count:
+            bucket = buckets.get(current_f)
+            while not bucket:
+                current_f += 1
+                bucket = buckets.get(current_f)
+            idx = bucket.popleft()
+            open_count -= 1
+
+            if closed[idx]:
                 continue
-            
-            closed_set.add((current.row, current.col))
-            
+            closed[idx] = True
+
             # Check if we reached the goal
-            if current.row == goal_node.row and current.col == goal_node.col:
-                # Reconstruct path
+            if idx == goal_idx:
+                # Reconstruct path by walking the parent indices backward
                 path = []
-                while current:
-                    path.append((current.row, current.col))
-                    current = current.parent
-                return path[::-1]  # Reverse to get path from start to goal
-            
-            # Explore neighbors
-            for neighbor_pos in self._get_neighbors(current.row, current.col):
-                if neighbor_pos in closed_set:
+                while idx != -1:
+                    path.append((idx // cols, idx % cols))
+                    idx = int(parent[idx])
+                return tuple(path[::-1])  # Reverse to get path from start to goal
+
+            r0, c0 = divmod(idx, cols)
+            # All movements cost 1 (_get_cost); inlined to keep the hot
+            # loop free of a method call per edge
+            tentative_g = int(g_cost[idx]) + 1
+
+            # Explore neighbors — _get_neighbors and _heuristic inlined
+            for dr, dc in ((0, 1), (1, 0), (0, -1), (-1, 0)):
+                nr = r0 + dr
+                nc = c0 + dc
+                if nr < 0 or nr >= rows or nc < 0 or nc >= cols \
+                        or not passable[nr, nc]:
                     continue
-                
-                neighbor_node = node_map.get(neighbor_pos)
-                if neighbor_node is None:
-                    neighbor_node = Node(neighbor_pos[0], neighbor_pos[1])
-                    node_map[neighbor_pos] = neighbor_node
-                
-                tentative_g = current.g_cost + self._get_cost(
-                    (current.row, current.col), neighbor_pos
-                )
-                
-                if tentative_g < neighbor_node.g_cost or neighbor_node not in open_set:
-                    neighbor_node.parent = current
-                    neighbor_node.g_cost = tentative_g
-                    neighbor_node.h_cost = self._heuristic(
-                        (neighbor_node.row, neighbor_node.col),
-                        (goal_node.row, goal_node.col)
-                    )
-                    neighbor_node.f_cost = neighbor_node.g_cost + neighbor_node.h_cost
-                    
-                    if neighbor_node not in open_set:
-                        heapq.heappush(open_set, neighbor_node)
-        
+                n_idx = nr * cols + nc
+                if closed[n_idx]:
+                    continue
+
+                if tentative_g < g_cost[n_idx]:
+                    g_cost[n_idx] = tentative_g
+                    parent[n_idx] = idx
+                    f = tentative_g + h[n_idx]
+                    if f in buckets:
+                        buckets[f].append(n_idx)
+                    else:
+                        buckets[f] = deque((n_idx,))
+                    open_count += 1
+
         return None  # No path found
     
     def _find_nearest_accessible(self, shelf_pos: Tuple[int, int]) -> Optional[Tuple[int, int]]:
@@ -195,7 +399,7 @@ class Pathfinder:
             new_row, new_col = row + dr, col + dc
             if self.warehouse._in_bounds(new_row, new_col):
                 cell = self.warehouse.grid[new_row][new_col]
-                if cell.cell_type in ["lane", "free", "dock"]:
+                if cell.cell_type in ACCESS_CELL_TYPES:
                     return (new_row, new_col)
         
         return None
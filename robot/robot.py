@@ -2,13 +2,20 @@
 Robot class for warehouse automation.
 Handles robot movement, task queuing, and item retrieval.
 """
+import time
 from dataclasses import dataclass, field
 from typing import Optional, List, Tuple, Deque
 from enum import Enum
 from collections import deque
-from datetime import datetime, timedelta
+from datetime import datetime
+
+import numpy as np
+
 from robot.pathfinding import Pathfinder
 
+# Shared empty path — grid coordinates comfortably fit int16
+_EMPTY_PATH = np.empty((0, 2), dtype=np.int16)
+
 
 class RobotState(Enum):
     """Robot state enumeration."""
@@ -22,7 +29,7 @@ class RobotState(Enum):
 @dataclass
 class RobotTask:
     """Represents a task for a robot."""
-    task_id: str
+    task_id: int
     sku: str
     shelf_id: str
     shelf_position: Tuple[int, int]
@@ -49,10 +56,14 @@ class Robot:
         self.state = RobotState.IDLE
         self.task_queue: Deque[RobotTask] = deque()
         self.current_task: Optional[RobotTask] = None
-        self.path: List[Tuple[int, int]] = []
+        # (N, 2) int16 array of path steps: ~4 bytes per step instead of a
+        # ~56-byte tuple, and contiguous for the per-tick indexing below
+        self.path: np.ndarray = _EMPTY_PATH
         self.path_index = 0
         self.pathfinder: Optional[Pathfinder] = None
-        self.last_update_time = datetime.now()
+        # Monotonic float seconds — no datetime/timedelta objects in the
+        # per-tick update path
+        self.last_update_time: float = time.monotonic()
         self.carrying_item: Optional[str] = None  # SKU being carried
     
     def set_pathfinder(self, pathfinder: Pathfinder):
@@ -67,18 +78,19 @@ class Robot:
         """Get number of tasks in queue."""
         return len(self.task_queue)
     
-    def update(self, current_time: datetime):
+    def update(self, current_time: float):
         """
         Update robot state based on elapsed time.
-        
+
         Args:
-            current_time: Current simulation time
+            current_time: Current simulation time in monotonic float seconds
+                (e.g. time.monotonic())
         """
         if not self.pathfinder:
             return
-        
-        elapsed = (current_time - self.last_update_time).total_seconds()
-        
+
+        elapsed = current_time - self.last_update_time
+
         # Cap elapsed time to prevent large jumps
         elapsed = min(elapsed, 1.0)
         
@@ -115,7 +127,7 @@ class Robot:
         if shelf_pos:
             path = self.pathfinder.find_path(self.position, shelf_pos)
             if path:
-                self.path = path
+                self.path = np.asarray(path, dtype=np.int16)
                 self.path_index = 0
                 self.state = RobotState.MOVING
     
@@ -125,7 +137,7 @@ class Robot:
     
     def _update_movement(self, elapsed: float):
         """Update robot movement along path."""
-        if not self.path or self.path_index >= len(self.path) - 1:
+        if len(self.path) == 0 or self.path_index >= len(self.path) - 1:
             # Reached destination
             if self.state == RobotState.MOVING:
                 # Arrived at shelf, start picking
@@ -142,23 +154,22 @@ class Robot:
         
         # Calculate cells to move based on speed
         cells_to_move = self.speed * elapsed
-        
-        # Move along path
-        while cells_to_move > 0 and self.path_index < len(self.path) - 1:
-            current_pos = self.path[self.path_index]
-            next_pos = self.path[self.path_index + 1]
-            
-            # Calculate distance to next cell
-            distance = 1.0  # Manhattan distance between adjacent cells
-            
-            if cells_to_move >= distance:
-                # Move to next cell
+
+        # Move along path — advance the index; position materializes a
+        # plain tuple only once after the loop
+        last_index = len(self.path) - 1
+        moved = False
+        while cells_to_move > 0 and self.path_index < last_index:
+            # Distance to next cell is always 1 on the unit grid
+            if cells_to_move >= 1.0:
                 self.path_index += 1
-                self.position = self.path[self.path_index]
-                cells_to_move -= distance
+                cells_to_move -= 1.0
+                moved = True
             else:
                 # Partial movement (for future interpolation)
                 break
+        if moved:
+            self.position = tuple(self.path[self.path_index].tolist())
     
     def _complete_picking(self):
         """Complete picking item from shelf."""
@@ -169,7 +180,7 @@ class Robot:
             dock_pos = self.current_task.dock_position
             path = self.pathfinder.find_path(self.position, dock_pos)
             if path:
-                self.path = path
+                self.path = np.asarray(path, dtype=np.int16)
                 self.path_index = 0
                 self.state = RobotState.DELIVERING
             else:
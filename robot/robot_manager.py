@@ -1,12 +1,36 @@
 """
 Robot Manager for handling multiple robots and task queuing.
 """
-from typing import List, Dict, Optional
-from robot.robot import Robot, RobotTask
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from robot.robot import Robot, RobotState, RobotTask
 from robot.pathfinding import Pathfinder
 from integrated_warehouse import IntegratedWarehouse
 from datetime import datetime, timedelta
-import uuid
+import heapq
+import time
+
+# States where a robot is simply advancing along its path — these can be
+# updated for the whole fleet at once; transitions stay per-robot
+_PATH_STATES = (RobotState.MOVING, RobotState.DELIVERING, RobotState.RETURNING)
+
+# Task statuses stored as int8 codes in the SoA task table; the tuple
+# index is the code, so decode is a plain indexing operation
+_TASK_STATUS_CODES = ("pending", "in_progress", "completed", "failed")
+_TASK_STATUS_INDEX = {status: i for i, status in enumerate(_TASK_STATUS_CODES)}
+# Codes >= this are terminal: the live RobotTask can be dropped
+_TASK_DONE_CODE = _TASK_STATUS_INDEX["completed"]
+
+# Numeric task columns grow by this many rows at a time
+_TASK_CHUNK = 1024
+
+
+def _us_to_isoformat(us: int) -> str:
+    """Render a microsecond epoch timestamp the way datetime.isoformat does."""
+    seconds, micros = divmod(int(us), 1_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=micros).isoformat()
 
 
 class RobotManager:
@@ -24,38 +48,89 @@ class RobotManager:
         self.warehouse = warehouse
         self.pathfinder = Pathfinder(warehouse.warehouse)
         self.robots: List[Robot] = []
-        self.all_tasks: Dict[str, RobotTask] = {}
-        self.simulation_time = datetime.now()
-        
-        # Find dock position (assume first dock is main docking station)
-        dock_pos = None
-        for node in warehouse.warehouse.special_nodes:
-            if node.node_type == "dock":
-                dock_pos = node.coordinates
-                break
+        # Struct-of-arrays task table: parallel columns instead of one
+        # RobotTask object per task. String columns are plain lists; the
+        # status and timestamp columns are NumPy arrays grown in chunks.
+        # Live RobotTask objects exist only while a task is still moving
+        # through a robot queue; finished tasks survive as rows alone.
+        self._task_idx: Dict[int, int] = {}
+        self._task_ids: List[int] = []
+        self._task_sku: List[str] = []
+        self._task_shelf_id: List[str] = []
+        self._task_status = np.zeros(_TASK_CHUNK, dtype=np.int8)
+        self._task_created_us = np.zeros(_TASK_CHUNK, dtype=np.int64)
+        self._task_count = 0
+        # Incremented as tasks reach "completed", so the summary metric
+        # is an attribute read rather than a count over the table
+        self._completed_count = 0
+        self._live_tasks: Dict[int, RobotTask] = {}
+        # Status dicts built by get_task_status, cached per task so
+        # repeat queries mutate one "status" key instead of rebuilding
+        # the whole dict; only queried tasks pay the dict cost
+        self._status_dict_cache: Dict[int, Dict] = {}
+        # Monotonic task IDs: an int bump per task instead of a uuid4
+        # (urandom read + 36-char string) per request. Starts at 1 so
+        # no ID is falsy at truthiness-checking call sites.
+        self._next_task_id = 1
+        # Wall-clock datetime only feeds RobotTask.created_at, so update()
+        # advances a bare microsecond counter and the datetime is built
+        # lazily by the simulation_time property; the robot tick path runs
+        # on a monotonic float clock
+        self._sim_epoch = datetime.now()
+        self._sim_us = 0
+        self.sim_clock: float = time.monotonic()
         
-        if dock_pos is None:
-            # Find first accessible position if no dock found
-            for r in range(warehouse.warehouse.rows):
-                for c in range(warehouse.warehouse.cols):
-                    cell = warehouse.warehouse.grid[r][c]
-                    if cell.cell_type in ["lane", "lane_forward", "lane_backward", "free"]:
-                        dock_pos = (r, c)
-                        break
-                if dock_pos:
-                    break
-        
-        if dock_pos is None:
+        # Find dock position once (assume first dock is main docking
+        # station) and cache it — request_item reuses it on every call
+        self.dock_pos: Optional[Tuple[int, int]] = None
+        docks = warehouse.warehouse._nodes_by_type.get("dock")
+        if docks:
+            self.dock_pos = docks[0].coordinates
+
+        start_pos = self.dock_pos
+        if start_pos is None:
+            # No dock: take the first lane cell (tracked by the layout as
+            # lanes are created), falling back to a vectorized scan of
+            # the passable mask for lane-less layouts
+            lane_cells = warehouse.warehouse._lane_cells
+            if lane_cells:
+                start_pos = lane_cells[0]
+            else:
+                coords = np.argwhere(self.pathfinder.passable)
+                if coords.shape[0] > 0:
+                    start_pos = (int(coords[0, 0]), int(coords[0, 1]))
+
+        if start_pos is None:
             # Default to (0, 0) if no suitable position found
-            dock_pos = (0, 0)
+            start_pos = (0, 0)
         
         # Create robots at dock position
         for i in range(num_robots):
-            robot = Robot(f"Robot_{i+1}", dock_pos, robot_speed)
+            robot = Robot(f"Robot_{i+1}", start_pos, robot_speed)
             robot.set_pathfinder(self.pathfinder)
             self.robots.append(robot)
-    
-    def request_item(self, sku: str) -> Optional[str]:
+
+        # Priority queue of (queue_length, tie_breaker, robot_index) for
+        # O(log R) lightest-robot selection. Every queue-length change
+        # pushes a fresh entry; outdated duplicates are lazily discarded
+        # at pop time in request_item.
+        self._robot_heap: List[tuple] = [
+            (0, i, i) for i in range(len(self.robots))
+        ]
+        self._recorded_len = [0] * len(self.robots)
+        self._heap_counter = len(self.robots)
+
+    @property
+    def simulation_time(self) -> datetime:
+        """Current simulated wall-clock time, materialized on access."""
+        return self._sim_epoch + timedelta(microseconds=self._sim_us)
+
+    @simulation_time.setter
+    def simulation_time(self, value: datetime):
+        self._sim_epoch = value
+        self._sim_us = 0
+
+    def request_item(self, sku: str) -> Optional[int]:
         """
         Request a robot to bring an item from shelf to dock.
         
@@ -65,51 +140,109 @@ class RobotManager:
         Returns:
             Task ID if successful, None if item not found
         """
+        return self._create_task(sku, self.simulation_time)
+
+    def request_items(self, skus: List[str]) -> List[Optional[int]]:
+        """
+        Request robots for several SKUs in one call.
+
+        Amortizes the per-request fixed overhead: the creation timestamp
+        is materialized once for the whole batch and each SKU costs only
+        its two dict lookups plus the heap assignment.
+
+        Args:
+            skus: SKUs to retrieve, in request order
+
+        Returns:
+            One task ID (or None for unknown SKUs) per input SKU
+        """
+        created_at = self.simulation_time
+        return [self._create_task(sku, created_at) for sku in skus]
+
+    def _create_task(self, sku: str, created_at: datetime) -> Optional[int]:
+        """Build a retrieval task for one SKU and assign it to a robot."""
         # Find item in inventory
         item = self.warehouse.inventory_manager.get_by_sku(sku)
         if not item:
             return None
-        
-        # Get shelf position
+
+        # Get shelf position — O(1) via the warehouse's shelf index
         shelf_id = item.shelf_location
-        shelf = None
-        for s in self.warehouse.warehouse.shelves:
-            if s.id == shelf_id:
-                shelf = s
-                break
-        
+        shelf = self.warehouse.warehouse._shelves_by_id.get(shelf_id)
         if not shelf:
             return None
-        
-        # Find dock position
-        dock_pos = None
-        for node in self.warehouse.warehouse.special_nodes:
-            if node.node_type == "dock":
-                dock_pos = node.coordinates
-                break
-        
+
+        # Route to the dock nearest the shelf; with a single dock this
+        # returns the same cached position request_item always used
+        dock = self.warehouse.warehouse.nearest_special_node(
+            "dock", shelf.coordinates)
+        dock_pos = dock.coordinates if dock else None
         if not dock_pos:
             return None
-        
+
         # Create task
-        task_id = str(uuid.uuid4())
+        task_id = self._next_task_id
+        self._next_task_id = task_id + 1
         task = RobotTask(
             task_id=task_id,
             sku=sku,
             shelf_id=shelf_id,
             shelf_position=shelf.coordinates,
             dock_position=dock_pos,
-            created_at=self.simulation_time
+            created_at=created_at
         )
-        
-        self.all_tasks[task_id] = task
-        
-        # Assign to robot with shortest queue
-        robot = min(self.robots, key=lambda r: r.get_queue_length())
+
+        self._append_task(task)
+
+        # Assign to robot with shortest queue: discard stale heap entries
+        # until the top reflects a robot's real queue length (every robot
+        # always has one accurate entry, so this terminates)
+        heap = self._robot_heap
+        while True:
+            qlen, _, ridx = heap[0]
+            robot = self.robots[ridx]
+            if qlen == robot.get_queue_length():
+                break
+            heapq.heappop(heap)
+
         robot.add_task(task)
-        
+        self._recorded_len[ridx] = qlen + 1
+        heapq.heapreplace(heap, (qlen + 1, self._heap_counter, ridx))
+        self._heap_counter += 1
+
         return task_id
-    
+
+    def _append_task(self, task: RobotTask):
+        """Append a task as a new row in the SoA task table."""
+        i = self._task_count
+        if i == len(self._task_status):
+            self._task_status = np.resize(self._task_status, i + _TASK_CHUNK)
+            self._task_created_us = np.resize(self._task_created_us, i + _TASK_CHUNK)
+        self._task_idx[task.task_id] = i
+        self._task_ids.append(task.task_id)
+        self._task_sku.append(task.sku)
+        self._task_shelf_id.append(task.shelf_id)
+        self._task_status[i] = _TASK_STATUS_INDEX[task.status]
+        self._task_created_us[i] = int(task.created_at.timestamp() * 1_000_000)
+        self._task_count = i + 1
+        self._live_tasks[task.task_id] = task
+
+    def _sync_live_tasks(self):
+        """
+        Fold robot-side status changes into the status column and drop
+        live RobotTask objects once they reach a terminal status.
+        """
+        finished = []
+        for task_id, task in self._live_tasks.items():
+            code = _TASK_STATUS_INDEX[task.status]
+            self._task_status[self._task_idx[task_id]] = code
+            if code >= _TASK_DONE_CODE:
+                if code == _TASK_DONE_CODE:
+                    self._completed_count += 1
+                finished.append(task_id)
+        for task_id in finished:
+            del self._live_tasks[task_id]
+
     def update(self, delta_time: float = 1.0):
         """
         Update all robots.
@@ -117,30 +250,130 @@ class RobotManager:
         Args:
             delta_time: Time elapsed in seconds
         """
-        self.simulation_time += timedelta(seconds=delta_time)
-        
+        self._sim_us += int(delta_time * 1_000_000)
+        self.sim_clock += delta_time
+        now = self.sim_clock
+
+        # Robots mid-path only need their index advanced — batch those
+        # with one vectorized step computation. Robots that are idle,
+        # picking, or at the end of a path take the per-robot update,
+        # which is where state transitions happen.
+        fast: List[Robot] = []
         for robot in self.robots:
-            robot.update(self.simulation_time)
+            if (robot.pathfinder is not None
+                    and robot.state in _PATH_STATES
+                    and robot.path_index < len(robot.path) - 1):
+                fast.append(robot)
+            else:
+                robot.update(now)
+
+        # Task completions drain queues only inside robot.update, so one
+        # refresh here keeps the assignment heap's invariant: every robot
+        # has at least one accurate entry. The same sweep is the natural
+        # point to retire finished tasks from the live-object map.
+        self._refresh_robot_heap()
+        self._sync_live_tasks()
+
+        if not fast:
+            return
+
+        elapsed = np.minimum(
+            now - np.array([r.last_update_time for r in fast]), 1.0
+        )
+        speeds = np.array([r.speed for r in fast])
+        idx = np.array([r.path_index for r in fast], dtype=np.int64)
+        last = np.array([len(r.path) - 1 for r in fast], dtype=np.int64)
+        new_idx = np.minimum(
+            idx + np.floor(speeds * elapsed).astype(np.int64), last
+        )
+
+        for robot, old_i, new_i in zip(fast, idx, new_idx):
+            if new_i != old_i:
+                robot.path_index = int(new_i)
+                robot.position = tuple(robot.path[new_i].tolist())
+            robot.last_update_time = now
+
+    def _refresh_robot_heap(self):
+        """Push fresh heap entries for robots whose queues have drained."""
+        rec = self._recorded_len
+        for i, robot in enumerate(self.robots):
+            qlen = robot.get_queue_length()
+            if qlen < rec[i]:
+                rec[i] = qlen
+                heapq.heappush(self._robot_heap, (qlen, self._heap_counter, i))
+                self._heap_counter += 1
     
     def get_robot_statuses(self) -> List[Dict]:
         """Get status of all robots."""
         return [robot.get_status() for robot in self.robots]
     
-    def get_task_status(self, task_id: str) -> Optional[Dict]:
+    def get_task_status(self, task_id: int) -> Optional[Dict]:
         """Get status of a specific task."""
-        task = self.all_tasks.get(task_id)
-        if not task:
+        i = self._task_idx.get(task_id)
+        if i is None:
             return None
-        
-        return {
-            "task_id": task.task_id,
-            "sku": task.sku,
-            "shelf_id": task.shelf_id,
-            "status": task.status,
-            "created_at": task.created_at.isoformat()
+
+        # A still-live task may have been advanced by its robot since the
+        # last sync — read the status straight off the object
+        task = self._live_tasks.get(task_id)
+        if task is not None:
+            self._task_status[i] = _TASK_STATUS_INDEX[task.status]
+
+        status = _TASK_STATUS_CODES[self._task_status[i]]
+        cached = self._status_dict_cache.get(task_id)
+        if cached is not None:
+            # Everything but the status is immutable once created
+            cached["status"] = status
+            return cached
+
+        result = {
+            "task_id": task_id,
+            "sku": self._task_sku[i],
+            "shelf_id": self._task_shelf_id[i],
+            "status": status,
+            "created_at": _us_to_isoformat(self._task_created_us[i])
         }
-    
+        self._status_dict_cache[task_id] = result
+        return result
+
     def get_all_tasks(self) -> List[Dict]:
         """Get all tasks."""
-        return [self.get_task_status(task_id) for task_id in self.all_tasks.keys()]
+        self._sync_live_tasks()
+        n = self._task_count
+        return [
+            {
+                "task_id": task_id,
+                "sku": sku,
+                "shelf_id": shelf_id,
+                "status": _TASK_STATUS_CODES[code],
+                "created_at": _us_to_isoformat(created_us)
+            }
+            for task_id, sku, shelf_id, code, created_us in zip(
+                self._task_ids, self._task_sku, self._task_shelf_id,
+                self._task_status[:n].tolist(),
+                self._task_created_us[:n].tolist())
+        ]
+
+    @property
+    def total_task_count(self) -> int:
+        """Number of tasks ever created."""
+        return self._task_count
+
+    @property
+    def completed_task_count(self) -> int:
+        """Completed-task total maintained incrementally."""
+        self._sync_live_tasks()
+        return self._completed_count
+
+    def get_task_counts(self) -> Dict[str, int]:
+        """Get per-status task counts with one bincount over the table."""
+        self._sync_live_tasks()
+        counts = np.bincount(
+            self._task_status[:self._task_count],
+            minlength=len(_TASK_STATUS_CODES)
+        )
+        return {
+            status: int(count)
+            for status, count in zip(_TASK_STATUS_CODES, counts)
+        }
 
@@ -31,8 +31,7 @@ def create_default_warehouse() -> Warehouse:
         ShelfLocation("C1", (7, 1), capacity=50),
         ShelfLocation("D1", (7, 7), capacity=50),
     ]
-    for shelf in shelves:
-        warehouse.add_shelf(shelf)
+    warehouse.add_shelves_bulk(shelves)
     
     # Add special nodes
     specials = [
@@ -131,12 +130,15 @@ def main():
             print("\n📦 Current Inventory:")
             items = integrated_warehouse.inventory_manager.list_all_items()
             if items:
-                for i in items:
-                    arrival_str = i.arrival_time.strftime('%d/%m/%Y %H:%M:%S') if i.arrival_time else "N/A"
-                    expiry_str = i.expiry.strftime('%d/%m/%Y %H:%M:%S') if i.expiry else "N/A"
-                    print(f"  SKU: {i.sku:10} | Name: {i.name:20} | Qty: {i.quantity:5} | "
-                          f"Shelf: {i.shelf_location:5} | Category: {i.category:15} | "
-                          f"Expiry: {expiry_str}")
+                # Buffer the listing and emit it with one write instead
+                # of a syscall per item line
+                lines = [
+                    f"  SKU: {i.sku:10} | Name: {i.name:20} | Qty: {i.quantity:5} | "
+                    f"Shelf: {i.shelf_location:5} | Category: {i.category:15} | "
+                    f"Expiry: {i.expiry_str}"
+                    for i in items
+                ]
+                sys.stdout.write("\n".join(lines) + "\n")
             else:
                 print("  ⚠️ No items in inventory.")
         
@@ -144,8 +146,8 @@ def main():
             sku = input("Enter SKU to search: ").strip()
             item = integrated_warehouse.inventory_manager.get_by_sku(sku)
             if item:
-                arrival_str = item.arrival_time.strftime('%d/%m/%Y %H:%M:%S') if item.arrival_time else "N/A"
-                expiry_str = item.expiry.strftime('%d/%m/%Y %H:%M:%S') if item.expiry else "N/A"
+                arrival_str = item.arrival_str
+                expiry_str = item.expiry_str
                 print(f"\n✅ Found Item:")
                 print(f"  SKU: {item.sku}")
                 print(f"  Name: {item.name}")
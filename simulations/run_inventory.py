@@ -49,11 +49,18 @@ def main():
         elif choice == "2":
             print("\n📦 Current Inventory:")
             items = manager.list_all_items()
-            for i in items:
-                arrival_str = i.arrival_time.strftime('%d/%m/%Y %H:%M:%S') if i.arrival_time else "N/A"
-                expiry_str = i.expiry.strftime('%d/%m/%Y %H:%M:%S') if i.expiry else "N/A"
-                print(f"SKU: {i.sku}, Name: {i.name}, Qty: {i.quantity}, Shelf: {i.shelf_location}, Arrival Time: {arrival_str}, Expiry: {expiry_str}")
-            if not items:
+            # Buffer the listing and emit it with one write instead of a
+            # syscall per item line
+            lines = [
+                f"SKU: {i.sku}, Name: {i.name}, Qty: {i.quantity}, "
+                f"Shelf: {i.shelf_location}, "
+                f"Arrival Time: {i.arrival_str}, "
+                f"Expiry: {i.expiry_str}"
+                for i in items
+            ]
+            if lines:
+                sys.stdout.write("\n".join(lines) + "\n")
+            else:
                 print("⚠️ No items in inventory.")
 
         elif choice == "3":
@@ -5,7 +5,6 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import streamlit as st
 import numpy as np
 import pandas as pd
-import time
 from datetime import datetime, timedelta
 
 # Try Plotly, fallback to Matplotlib
@@ -69,8 +68,7 @@ def create_default_warehouse() -> Warehouse:
         ShelfLocation("I1", (12, 14), capacity=50),
         ShelfLocation("J1", (12, 18), capacity=50),
     ]
-    for shelf in shelves:
-        warehouse.add_shelf(shelf)
+    warehouse.add_shelves_bulk(shelves)
     
     # Add special nodes
     specials = [
@@ -86,75 +84,291 @@ def create_default_warehouse() -> Warehouse:
 
 
 
+@st.cache_resource
+def _load_warehouse() -> IntegratedWarehouse:
+    """
+    Load the warehouse from the database, creating and persisting the
+    default layout if none exists. cache_resource keeps the instance
+    alive across reruns, so reconnecting via the Start button skips the
+    DB round-trip entirely.
+    """
+    try:
+        return IntegratedWarehouse(load_from_db=True)
+    except ValueError:
+        # No warehouse in database, create default one
+        warehouse = IntegratedWarehouse(
+            warehouse=create_default_warehouse(), load_from_db=False)
+        warehouse.save_warehouse_to_db()
+        return warehouse
+
+
+@st.cache_data
+def _cached_items(_inventory_manager, version: int):
+    """
+    Inventory listing cached per inventory version — the version bumps
+    on every mutation, so reruns between changes skip the query and the
+    list rebuild entirely.
+    """
+    return _inventory_manager.list_all_items()
+
+
+@st.cache_data
+def _items_dataframe(_inventory_manager, version: int) -> pd.DataFrame:
+    """
+    Items table cached per inventory version. Built column-wise — one
+    list per column instead of a dict allocation per row; expiry
+    strings come pre-formatted from the cached Item property, so no
+    strftime runs on a rerun at all.
+    """
+    items = _cached_items(_inventory_manager, version)
+    return pd.DataFrame({
+        "SKU": [i.sku for i in items],
+        "Name": [i.name for i in items],
+        "Category": [i.category for i in items],
+        "Quantity": [i.quantity for i in items],
+        "Shelf": [i.shelf_location for i in items],
+        "Expiry": [i.expiry_str for i in items]
+    })
+
+
+@st.cache_data(ttl=5)
+def _warehouse_status(_warehouse, version: int):
+    """
+    Warehouse aggregates cached per inventory version — the status scan
+    is O(items + shelves), so ticks between mutations reuse it. The
+    short TTL keeps the clock-dependent expiry counts fresh.
+    """
+    return _warehouse.get_warehouse_status()
+
+
+@st.cache_data(ttl=10)
+def _sku_dropdown(_inventory_manager, version: int):
+    """
+    Labels and label -> SKU mapping for the retrieval dropdown, cached
+    per inventory version so reruns skip the O(items) rebuild.
+    """
+    labels = []
+    mapping = {}
+    for i in _cached_items(_inventory_manager, version):
+        label = f"{i.sku} - {i.name} ({i.category})"
+        labels.append(label)
+        mapping[label] = i.sku
+    return labels, mapping
+
+
+@st.cache_data(ttl=5)
+def _build_expiry_frame(_inventory_manager, version: int):
+    """
+    "Expiring soon" table for the first 20 entries of the expiry index,
+    cached per inventory version. Date formatting and the days-until
+    arithmetic run vectorized over the whole slice instead of per row;
+    the TTL keeps the day counts from drifting across midnight.
+    """
+    soon = [i for i in _inventory_manager.expiry_index[:20] if i.expiry]
+    if not soon:
+        return None
+    expiries = pd.to_datetime([i.expiry for i in soon])
+    days_until = pd.Series((expiries - pd.Timestamp.now()).days)
+    return pd.DataFrame({
+        "SKU": [i.sku for i in soon],
+        "Name": [i.name for i in soon],
+        "Shelf": [i.shelf_location for i in soon],
+        "Expiry Date": expiries.strftime('%d/%m/%Y'),
+        "Status": np.where(days_until < 0, "EXPIRED",
+                           days_until.astype(str) + " days")
+    })
+
+
+@st.cache_data(ttl=2, max_entries=4)
+def _cached_db_stats(_warehouse, version: int):
+    """
+    Database aggregates cached per inventory version. Shelf loads also
+    shift as robots deliver, so the TTL bounds how stale those get.
+    """
+    return _warehouse.get_database_stats()
+
+
+@st.cache_data(ttl=2, max_entries=4)
+def _cached_robot_statuses(_robot_manager, version: int):
+    """Robot status dicts, refreshed at most every couple of seconds."""
+    return _robot_manager.get_robot_statuses()
+
+
+@st.cache_data(ttl=2, max_entries=4)
+def _cached_all_tasks(_robot_manager, version: int):
+    """Task history keyed on the task counter, TTL-bounded for status
+    changes that happen without new tasks."""
+    return _robot_manager.get_all_tasks()
+
+
+@st.cache_data
+def _sorted_shelf_ids(_warehouse, shelf_count: int):
+    """Sorted shelf IDs, re-sorted only when a shelf is added."""
+    return sorted(_warehouse.shelf_lookup.keys())
+
+
+# Task status icons for the tab4 queue — built once, not per rerun
+_TASK_STATUS_ICONS = {
+    "pending": "🟡",
+    "in_progress": "🔵",
+    "completed": "🟢",
+    "failed": "🔴"
+}
+
+# Cell layer encoding for the 2D view: cell types become int8 codes
+# rendered through one Heatmap trace with a discrete colorscale, instead
+# of one rect shape per cell
+_CELL_TYPES = ("free", "shelf", "lane_forward", "lane_backward", "lane",
+               "dock", "packing", "truck_bay")
+_CELL_TYPE_CODE = {t: i for i, t in enumerate(_CELL_TYPES)}
+_CELL_COLORS = {
+    "free": "white",
+    "shelf": "#8B4513",
+    "lane_forward": "#87CEEB",
+    "lane_backward": "#90EE90",
+    "lane": "gray",
+    "dock": "blue",
+    "packing": "yellow",
+    "truck_bay": "orange"
+}
+# Stepwise colorscale: band i covers code i exactly (zmin/zmax pad the
+# range by half a band on each side)
+_CELL_COLORSCALE = []
+for _i, _t in enumerate(_CELL_TYPES):
+    _CELL_COLORSCALE.append([_i / len(_CELL_TYPES), _CELL_COLORS[_t]])
+    _CELL_COLORSCALE.append([(_i + 1) / len(_CELL_TYPES), _CELL_COLORS[_t]])
+
+
+# Unit shelf block for the 3D view: vertex offsets around the cell
+# center plus the i/j/k triangulation of a cube. Every shelf reuses
+# these with its index offset, so all blocks fit in one Mesh3d trace.
+_CUBE_DX = (-0.4, -0.4, 0.4, 0.4, -0.4, -0.4, 0.4, 0.4)
+_CUBE_DY = (-0.4, 0.4, 0.4, -0.4, -0.4, 0.4, 0.4, -0.4)
+_CUBE_Z = (0.0, 0.0, 0.0, 0.0, 1.0, 1.0, 1.0, 1.0)
+_CUBE_I = (7, 0, 0, 0, 4, 4, 6, 6, 4, 0, 3, 2)
+_CUBE_J = (3, 4, 1, 2, 5, 6, 5, 2, 0, 1, 6, 3)
+_CUBE_K = (0, 7, 2, 3, 6, 7, 1, 1, 5, 5, 7, 6)
+
+
+def _downsample_path(pts: np.ndarray, max_pts: int = 200) -> np.ndarray:
+    """
+    Cap a path at max_pts points by striding, always keeping the last
+    point. Paths grow for the whole simulation, so without a cap the
+    per-tick render cost grows with runtime; on a grid this coarse a
+    strided path is visually identical.
+    """
+    n = len(pts)
+    if n <= max_pts:
+        return pts
+    step = -(-n // max_pts)  # ceil(n / max_pts)
+    sampled = pts[::step]
+    if (n - 1) % step:
+        sampled = np.concatenate((sampled, pts[-1:]))
+    return sampled
+
+
 # --- UI Overhaul: New Visualization Functions ---
 def visualize_warehouse_plotly_3d(warehouse: IntegratedWarehouse, robot_manager: RobotManager = None, show_grid=True, show_paths=True):
     """3D warehouse visualization using Plotly."""
     w = warehouse.warehouse
     rows, cols = w.rows, w.cols
     fig = go.Figure()
-    # Draw shelves as 3D blocks
-    for shelf in w.shelves:
-        r, c = shelf.coordinates
+    # Draw all shelves as one Mesh3d (8 vertices / 12 triangles per
+    # block, indices offset per shelf) plus one text trace for labels —
+    # a Scatter3d per shelf is what makes Plotly crawl at scale
+    if w.shelves:
+        xs, ys, zs = [], [], []
+        i_idx, j_idx, k_idx = [], [], []
+        for s, shelf in enumerate(w.shelves):
+            r, c = shelf.coordinates
+            base = 8 * s
+            xs.extend(c + dx for dx in _CUBE_DX)
+            ys.extend(r + dy for dy in _CUBE_DY)
+            zs.extend(_CUBE_Z)
+            i_idx.extend(base + v for v in _CUBE_I)
+            j_idx.extend(base + v for v in _CUBE_J)
+            k_idx.extend(base + v for v in _CUBE_K)
+        fig.add_trace(go.Mesh3d(
+            x=xs, y=ys, z=zs, i=i_idx, j=j_idx, k=k_idx,
+            color="#8B4513", flatshading=True, hoverinfo="skip"
+        ))
+        shelf_coords = w.shelf_coords
         fig.add_trace(go.Scatter3d(
-            x=[c], y=[r], z=[0.5],  # z=0.5 for shelf height
-            mode="markers+text",
-            marker=dict(size=20, color="#8B4513", symbol="cube"),
-            text=[shelf.id],
+            x=shelf_coords[:, 1],
+            y=shelf_coords[:, 0],
+            z=[1.1] * len(w.shelves),
+            mode="text",
+            text=[shelf.id for shelf in w.shelves],
             textposition="top center",
-            hoverinfo="text"
+            hoverinfo="text",
+            showlegend=False
         ))
-    # Draw special nodes
-    for node in w.special_nodes:
-        r, c = node.coordinates
-        color = {"dock": "blue", "packing": "yellow", "truck_bay": "orange"}.get(node.node_type, "gray")
+    # Draw special nodes, one trace per type
+    node_colors = {"dock": "blue", "packing": "yellow", "truck_bay": "orange"}
+    for node_type, nodes in w._nodes_by_type.items():
         fig.add_trace(go.Scatter3d(
-            x=[c], y=[r], z=[0],
+            x=[n.coordinates[1] for n in nodes],
+            y=[n.coordinates[0] for n in nodes],
+            z=[0] * len(nodes),
             mode="markers",
-            marker=dict(size=14, color=color, symbol="diamond"),
-            name=node.node_type
+            marker=dict(size=14, color=node_colors.get(node_type, "gray"), symbol="diamond"),
+            name=node_type
         ))
-    # Draw robots
+    # Draw robots batched: one marker trace with per-point colors, and
+    # all paths flattened into one trace with None separators
     if robot_manager:
+        state_colors = {
+            'idle': 'gray',
+            'moving': 'blue',
+            'picking': 'orange',
+            'delivering': 'green',
+            'returning': 'purple'
+        }
+        robot_x, robot_y, robot_ids, robot_colors = [], [], [], []
+        path_x, path_y = [], []
         for robot in robot_manager.robots:
             r, c = robot.position
-            state_colors = {
-                'idle': 'gray',
-                'moving': 'blue',
-                'picking': 'orange',
-                'delivering': 'green',
-                'returning': 'purple'
-            }
-            color = state_colors.get(robot.state.value, 'red')
+            robot_x.append(c)
+            robot_y.append(r)
+            robot_ids.append(robot.robot_id)
+            robot_colors.append(state_colors.get(robot.state.value, 'red'))
+            if show_paths and len(robot.path) > 1:
+                path = _downsample_path(robot.path)
+                path_x.extend(path[:, 1].tolist())
+                path_x.append(None)
+                path_y.extend(path[:, 0].tolist())
+                path_y.append(None)
+        if robot_x:
             fig.add_trace(go.Scatter3d(
-                x=[c], y=[r], z=[1],
+                x=robot_x, y=robot_y, z=[1] * len(robot_x),
                 mode="markers+text",
-                marker=dict(size=16, color=color, symbol="circle"),
-                text=[robot.robot_id],
+                marker=dict(size=16, color=robot_colors, symbol="circle"),
+                text=robot_ids,
                 textposition="top center",
-                name="Robot"
+                name="Robots"
             ))
-            # Draw robot path
-            if show_paths and robot.path and len(robot.path) > 1:
-                path_x = [pos[1] for pos in robot.path]
-                path_y = [pos[0] for pos in robot.path]
-                fig.add_trace(go.Scatter3d(
-                    x=path_x, y=path_y, z=[1]*len(path_x),
-                    mode="lines",
-                    line=dict(color="red", width=5),
-                    name="Path"
-                ))
-    # Draw grid lines (floor)
-    if show_grid:
-        for r in range(rows+1):
+        if path_x:
             fig.add_trace(go.Scatter3d(
-                x=[-0.5, cols-0.5], y=[r-0.5, r-0.5], z=[0, 0],
-                mode="lines", line=dict(color="lightgray", width=1), showlegend=False
-            ))
-        for c in range(cols+1):
-            fig.add_trace(go.Scatter3d(
-                x=[c-0.5, c-0.5], y=[-0.5, rows-0.5], z=[0, 0],
-                mode="lines", line=dict(color="lightgray", width=1), showlegend=False
+                x=path_x, y=path_y,
+                z=[1 if x is not None else None for x in path_x],
+                mode="lines",
+                line=dict(color="red", width=5),
+                name="Paths"
             ))
+    # Draw grid lines (floor) — every segment in a single trace
+    if show_grid:
+        grid_x, grid_y = [], []
+        for r in range(rows + 1):
+            grid_x.extend((-0.5, cols - 0.5, None))
+            grid_y.extend((r - 0.5, r - 0.5, None))
+        for c in range(cols + 1):
+            grid_x.extend((c - 0.5, c - 0.5, None))
+            grid_y.extend((-0.5, rows - 0.5, None))
+        fig.add_trace(go.Scatter3d(
+            x=grid_x, y=grid_y,
+            z=[0 if x is not None else None for x in grid_x],
+            mode="lines", line=dict(color="lightgray", width=1), showlegend=False
+        ))
     fig.update_layout(
         title="🏭 Warehouse 3D View",
         scene=dict(
@@ -173,40 +387,23 @@ def visualize_warehouse_heatmap(warehouse: IntegratedWarehouse, robot_manager: R
     w = warehouse.warehouse
     rows, cols = w.rows, w.cols
     grid = np.zeros((rows, cols))
-    # Use shelf load/capacity as heat value, 0 for non-shelf
-    for shelf in w.shelves:
-        r, c = shelf.coordinates
-        try:
-            shelf_info = warehouse.get_shelf_info(shelf.id)
-            load = shelf_info.get("current_load", 0)
-            capacity = shelf_info.get("capacity", 1)
-            value = load / capacity if capacity > 0 else 0
-            grid[r, c] = value
-        except Exception:
-            grid[r, c] = 0
-    # Plot as heatmap
+    # Use shelf load/capacity as heat value, 0 for non-shelf — one
+    # fancy-indexed assignment from the bulk utilization arrays instead
+    # of a get_shelf_info dict per shelf
+    shelf_rows, shelf_cols, utilization = warehouse.get_shelf_utilization_arrays()
+    grid[shelf_rows, shelf_cols] = utilization
+    # Plot as heatmap; cell gaps stand in for grid lines, avoiding
+    # (rows + cols + 2) line shapes on every rerun
     fig = go.Figure(data=go.Heatmap(
         z=grid,
         x=np.arange(cols),
         y=np.arange(rows),
         colorscale="YlOrRd",
         zmin=0, zmax=1,
-        colorbar=dict(title="Shelf Utilization")
+        colorbar=dict(title="Shelf Utilization"),
+        xgap=1 if show_grid else 0,
+        ygap=1 if show_grid else 0
     ))
-    # Optionally overlay grid lines
-    if show_grid:
-        for r in range(rows+1):
-            fig.add_shape(
-                type="line",
-                x0=-0.5, y0=r-0.5, x1=cols-0.5, y1=r-0.5,
-                line=dict(color="gray", width=0.5)
-            )
-        for c in range(cols+1):
-            fig.add_shape(
-                type="line",
-                x0=c-0.5, y0=-0.5, x1=c-0.5, y1=rows-0.5,
-                line=dict(color="gray", width=0.5)
-            )
     fig.update_layout(
         title="🔥 Warehouse Shelf Utilization Heatmap",
         xaxis=dict(title="Column", range=[-0.5, cols-0.5], showgrid=False),
@@ -216,166 +413,46 @@ def visualize_warehouse_heatmap(warehouse: IntegratedWarehouse, robot_manager: R
     return fig
 
 
-def visualize_warehouse_plotly(warehouse: IntegratedWarehouse, robot_manager: RobotManager = None, show_grid=True, show_paths=True):
-    """Create interactive 2D visualization of warehouse with robots using Plotly."""
-    w = warehouse.warehouse
-    rows, cols = w.rows, w.cols
+@st.cache_resource(max_entries=4)
+def _warehouse_base_figure(cell_grid_bytes: bytes, rows: int, cols: int,
+                           shelf_labels: tuple, show_grid: bool):
+    """
+    Static layer of the 2D view: cell heatmap, shelf labels and layout.
+
+    Cached across Streamlit reruns — during simulation only the robot
+    overlay changes per tick. The arguments are hashable snapshots of
+    the layout state, so any grid or shelf change refreshes the cache
+    entry by itself.
+    """
+    type_grid = np.frombuffer(
+        cell_grid_bytes, dtype=np.int8).reshape(rows, cols)
     fig = go.Figure()
-    color_map = {
-        "free": "white",
-        "shelf": "#8B4513",
-        "lane_forward": "#87CEEB",
-        "lane_backward": "#90EE90",
-        "lane": "gray",
-        "dock": "blue",
-        "packing": "yellow",
-        "truck_bay": "orange"
-    }
-    # Draw grid cells
-    for r in range(rows):
-        for c in range(cols):
-            cell = w.grid[r][c]
-            cell_type = cell.cell_type
-            if cell_type == "free":
-                continue
-            color = color_map.get(cell_type, "white")
-            fig.add_shape(
-                type="rect",
-                x0=c-0.5, y0=r-0.5, x1=c+0.5, y1=r+0.5,
-                fillcolor=color,
-                line=dict(color="black", width=1),
-                layer="below"
-            )
-    # Optionally overlay grid lines
-    if show_grid:
-        for r in range(rows+1):
-            fig.add_shape(
-                type="line",
-                x0=-0.5, y0=r-0.5, x1=cols-0.5, y1=r-0.5,
-                line=dict(color="lightgray", width=1),
-                layer="below"
-            )
-        for c in range(cols+1):
-            fig.add_shape(
-                type="line",
-                x0=c-0.5, y0=-0.5, x1=c-0.5, y1=rows-0.5,
-                line=dict(color="lightgray", width=1),
-                layer="below"
-            )
-    # Add shelf labels
-    shelf_text = []
-    shelf_x = []
-    shelf_y = []
-    for shelf in w.shelves:
-        r, c = shelf.coordinates
-        shelf_x.append(c)
-        shelf_y.append(r)
-        shelf_text.append(shelf.id)
-    if shelf_text:
+    # Whole cell layer as one Heatmap trace — rows*cols rect shapes
+    # would each become an SVG node and dominate render time on reruns.
+    # Cell gaps double as grid lines when show_grid is on.
+    fig.add_trace(go.Heatmap(
+        z=type_grid,
+        zmin=-0.5, zmax=len(_CELL_TYPES) - 0.5,
+        colorscale=_CELL_COLORSCALE,
+        showscale=False,
+        hoverinfo='skip',
+        xgap=1 if show_grid else 0,
+        ygap=1 if show_grid else 0
+    ))
+    # Add shelf labels — one zip unpacks all three columns at once
+    if shelf_labels:
+        shelf_ids, shelf_rows, shelf_cols = zip(*shelf_labels)
         fig.add_trace(go.Scatter(
-            x=shelf_x, y=shelf_y,
+            x=shelf_cols,
+            y=shelf_rows,
             mode='text',
-            text=shelf_text,
+            text=shelf_ids,
             textfont=dict(size=10, color='white', family='Arial Black'),
             showlegend=False,
             hoverinfo='skip'
         ))
-    # Add robot positions and paths
-    if robot_manager:
-        robot_x = []
-        robot_y = []
-        robot_ids = []
-        robot_states = []
-        robot_paths_x = []
-        robot_paths_y = []
-        robot_remaining_paths_x = []
-        robot_remaining_paths_y = []
-        for robot in robot_manager.robots:
-            r, c = robot.position
-            robot_x.append(c)
-            robot_y.append(r)
-            robot_ids.append(robot.robot_id.replace('_', ' '))
-            robot_states.append(robot.state.value)
-            # Draw full path
-            if show_paths and robot.path and len(robot.path) > 1:
-                path_x = [pos[1] for pos in robot.path]
-                path_y = [pos[0] for pos in robot.path]
-                robot_paths_x.append(path_x)
-                robot_paths_y.append(path_y)
-                # Draw remaining path
-                if robot.path_index < len(robot.path):
-                    remaining_path = robot.path[robot.path_index:]
-                    rem_x = [pos[1] for pos in remaining_path]
-                    rem_y = [pos[0] for pos in remaining_path]
-                    robot_remaining_paths_x.append(rem_x)
-                    robot_remaining_paths_y.append(rem_y)
-                else:
-                    robot_remaining_paths_x.append([])
-                    robot_remaining_paths_y.append([])
-        # Draw full paths (dashed)
-        for i, (path_x, path_y) in enumerate(zip(robot_paths_x, robot_paths_y)):
-            if len(path_x) > 1:
-                fig.add_trace(go.Scatter(
-                    x=path_x, y=path_y,
-                    mode='lines',
-                    line=dict(color='red', width=2, dash='dash'),
-                    opacity=0.5,
-                    showlegend=i == 0,
-                    name='Robot Path (Full)',
-                    hoverinfo='skip'
-                ))
-        # Draw remaining paths (solid)
-        for i, (path_x, path_y) in enumerate(zip(robot_remaining_paths_x, robot_remaining_paths_y)):
-            if len(path_x) > 1:
-                fig.add_trace(go.Scatter(
-                    x=path_x, y=path_y,
-                    mode='lines+markers',
-                    line=dict(color='red', width=3),
-                    marker=dict(size=6, color='red'),
-                    opacity=0.9,
-                    showlegend=i == 0,
-                    name='Robot Path (Remaining)',
-                    hoverinfo='skip'
-                ))
-        # Draw robots with state-based colors
-        state_colors = {
-            'idle': 'gray',
-            'moving': 'blue',
-            'picking': 'orange',
-            'delivering': 'green',
-            'returning': 'purple'
-        }
-        for i, (x, y, robot_id, state) in enumerate(zip(robot_x, robot_y, robot_ids, robot_states)):
-            color = state_colors.get(state, 'red')
-            fig.add_trace(go.Scatter(
-                x=[x], y=[y],
-                mode='markers+text',
-                marker=dict(
-                    size=25,
-                    color=color,
-                    line=dict(width=3, color='black'),
-                    symbol='circle'
-                ),
-                text=[robot_id],
-                textposition='top center',
-                textfont=dict(size=10, color='darkred', family='Arial Black'),
-                name=f'Robot ({state})' if i == 0 else '',
-                showlegend=i == 0,
-                hovertemplate=f'<b>{robot_id}</b><br>State: {state}<br>Position: ({y}, {x})<extra></extra>'
-            ))
-            # Add state indicator
-            fig.add_trace(go.Scatter(
-                x=[x + 0.3], y=[y + 0.3],
-                mode='markers+text',
-                marker=dict(size=15, color='white', line=dict(width=2, color=color)),
-                text=[state[0].upper()],
-                textposition='middle center',
-                textfont=dict(size=12, color=color, family='Arial Black'),
-                showlegend=False,
-                hoverinfo='skip'
-            ))
     fig.update_layout(
-        title=dict(text='🏭 Warehouse Layout - Interactive 2D Visualization', 
+        title=dict(text='🏭 Warehouse Layout - Interactive 2D Visualization',
                   font=dict(size=20, color='darkblue')),
         xaxis=dict(
             title='Column',
@@ -402,6 +479,104 @@ def visualize_warehouse_plotly(warehouse: IntegratedWarehouse, robot_manager: Ro
     return fig
 
 
+def visualize_warehouse_plotly(warehouse: IntegratedWarehouse, robot_manager: RobotManager = None, show_grid=True, show_paths=True):
+    """Create interactive 2D visualization of warehouse with robots using Plotly."""
+    w = warehouse.warehouse
+    rows, cols = w.rows, w.cols
+    type_grid = np.array(
+        [[_CELL_TYPE_CODE.get(cell.cell_type, 0) for cell in row]
+         for row in w.grid],
+        dtype=np.int8
+    )
+    shelf_labels = tuple(
+        (s.id, s.coordinates[0], s.coordinates[1]) for s in w.shelves)
+    base = _warehouse_base_figure(
+        type_grid.tobytes(), rows, cols, shelf_labels, show_grid)
+    # Copy the cached figure so per-tick robot traces never accumulate
+    # inside the shared cache entry
+    fig = go.Figure(base)
+    # Add robot positions and paths. Trace count stays O(states), not
+    # O(robots): markers are bucketed per state and all paths flatten
+    # into single traces with None separators (Plotly breaks the line
+    # at each None).
+    if robot_manager:
+        state_buckets = {}
+        full_x, full_y = [], []
+        rem_x, rem_y = [], []
+        for robot in robot_manager.robots:
+            r, c = robot.position
+            xs, ys, ids = state_buckets.setdefault(
+                robot.state.value, ([], [], []))
+            xs.append(c)
+            ys.append(r)
+            ids.append(robot.robot_id.replace('_', ' '))
+            if show_paths and len(robot.path) > 1:
+                path = _downsample_path(robot.path)
+                full_x.extend(path[:, 1].tolist())
+                full_x.append(None)
+                full_y.extend(path[:, 0].tolist())
+                full_y.append(None)
+                if robot.path_index < len(robot.path) - 1:
+                    remaining = _downsample_path(robot.path[robot.path_index:])
+                    rem_x.extend(remaining[:, 1].tolist())
+                    rem_x.append(None)
+                    rem_y.extend(remaining[:, 0].tolist())
+                    rem_y.append(None)
+        # Draw all full paths (dashed) as one WebGL trace — paths grow
+        # with simulation time and Scattergl repaints them off the SVG
+        # render path
+        if full_x:
+            fig.add_trace(go.Scattergl(
+                x=full_x, y=full_y,
+                mode='lines',
+                line=dict(color='red', width=2, dash='dash'),
+                opacity=0.5,
+                name='Robot Path (Full)',
+                hoverinfo='skip'
+            ))
+        # Draw all remaining paths (solid) as one WebGL trace
+        if rem_x:
+            fig.add_trace(go.Scattergl(
+                x=rem_x, y=rem_y,
+                mode='lines+markers',
+                line=dict(color='red', width=3),
+                marker=dict(size=6, color='red'),
+                opacity=0.9,
+                name='Robot Path (Remaining)',
+                hoverinfo='skip'
+            ))
+        # Draw robots with state-based colors, one trace per state
+        state_colors = {
+            'idle': 'gray',
+            'moving': 'blue',
+            'picking': 'orange',
+            'delivering': 'green',
+            'returning': 'purple'
+        }
+        for state, (xs, ys, ids) in state_buckets.items():
+            color = state_colors.get(state, 'red')
+            # State letter rides on the robot label, so one trace per
+            # state carries both — no separate indicator trace
+            letter = state[0].upper()
+            fig.add_trace(go.Scatter(
+                x=xs, y=ys,
+                mode='markers+text',
+                marker=dict(
+                    size=25,
+                    color=color,
+                    line=dict(width=3, color='black'),
+                    symbol='circle'
+                ),
+                text=[f'{rid} [{letter}]' for rid in ids],
+                textposition='top center',
+                textfont=dict(size=10, color='darkred', family='Arial Black'),
+                name=f'Robot ({state})',
+                hovertemplate='<b>%{text}</b><br>State: ' + state +
+                              '<br>Position: (%{y}, %{x})<extra></extra>'
+            ))
+    return fig
+
+
 def main():
     st.title("🏭 Warehouse Automation System")
     st.markdown("---")
@@ -413,21 +588,11 @@ def main():
         # Single button to initialize/load warehouse
         if st.button("🚀 Start Warehouse System", use_container_width=True, type="primary"):
             try:
-                # Try to load from database first
-                try:
-                    warehouse = IntegratedWarehouse(load_from_db=True)
-                    st.session_state.warehouse = warehouse
-                    st.session_state.robot_manager = None
-                    st.success("✅ Warehouse loaded from database!")
-                except ValueError:
-                    # No warehouse in database, create default one
-                    warehouse_layout = create_default_warehouse()
-                    warehouse = IntegratedWarehouse(warehouse=warehouse_layout, load_from_db=False)
-                    warehouse.save_warehouse_to_db()
-                    st.session_state.warehouse = warehouse
-                    st.session_state.robot_manager = None
-                    st.success("✅ New warehouse created and saved!")
-                
+                warehouse = _load_warehouse()
+                st.session_state.warehouse = warehouse
+                st.session_state.robot_manager = None
+                st.success("✅ Warehouse system ready!")
+
                 # Initialize robots after warehouse is loaded
                 num_robots = st.session_state.get('num_robots', 2)
                 robot_speed = st.session_state.get('robot_speed', 1.0)
@@ -468,16 +633,6 @@ def main():
         st.info("👈 Please click '🚀 Start Warehouse System' in the sidebar to begin.")
         return
     
-    # Ensure robot manager is initialized if warehouse exists
-    if st.session_state.warehouse and not st.session_state.robot_manager:
-        num_robots = st.session_state.get('num_robots', 2)
-        robot_speed = st.session_state.get('robot_speed', 1.0)
-        st.session_state.robot_manager = RobotManager(
-            st.session_state.warehouse, 
-            num_robots=num_robots, 
-            robot_speed=robot_speed
-        )
-    
     warehouse = st.session_state.warehouse
     robot_manager = st.session_state.robot_manager
     
@@ -485,7 +640,9 @@ def main():
     items = []
     if hasattr(warehouse, "inventory_manager") and warehouse.inventory_manager:
         try:
-            items = warehouse.inventory_manager.list_all_items()
+            items = _cached_items(
+                warehouse.inventory_manager,
+                warehouse.inventory_manager.version)
         except Exception as e:
             st.warning(f"⚠️ Could not fetch items from inventory manager: {e}")
     else:
@@ -504,29 +661,53 @@ def main():
     col1, col2 = st.columns([2, 1], gap="large")
     with col1:
         st.subheader("📊 Warehouse Visualization")
-        # Update robots if simulation running
-        if st.session_state.simulation_running and robot_manager:
-            current_time = datetime.now()
-            delta_time = (current_time - st.session_state.last_update).total_seconds()
-            delta_time = min(delta_time, 0.5)
-            if delta_time > 0:
-                robot_manager.update(delta_time)
-            st.session_state.last_update = current_time
-        # Choose visualization based on sidebar selection
-        if view_mode == "2D Top‑Down":
-            fig = visualize_warehouse_plotly(warehouse, robot_manager, show_grid=show_grid, show_paths=show_paths)
-        elif view_mode == "3D View":
-            fig = visualize_warehouse_plotly_3d(warehouse, robot_manager, show_grid=show_grid, show_paths=show_paths)
-        elif view_mode == "Heatmap":
-            fig = visualize_warehouse_heatmap(warehouse, robot_manager, show_grid=show_grid)
-        else:
-            fig = None
-        if fig is not None:
-            st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': True})
-        # Auto-refresh if simulation running
-        if st.session_state.simulation_running:
-            time.sleep(0.3)
-            st.rerun()
+
+        # Simulation ticks rerun only this fragment every 0.3s — the
+        # inventory/search/status tabs and sidebar rebuild solely on
+        # user interaction, not on every animation frame
+        @st.fragment(
+            run_every=0.3 if st.session_state.simulation_running else None)
+        def live_visualization():
+            # Update robots if simulation running
+            if st.session_state.simulation_running and robot_manager:
+                current_time = datetime.now()
+                delta_time = (current_time - st.session_state.last_update).total_seconds()
+                delta_time = min(delta_time, 0.5)
+                if delta_time > 0:
+                    robot_manager.update(delta_time)
+                st.session_state.last_update = current_time
+            # Rebuild the figure only when something visible changed
+            # since the last tick; idle periods (all robots parked, no
+            # inventory edits) resend the previous figure object, which
+            # the keyed chart diffs to a no-op in the frontend
+            sig = (view_mode, show_grid, show_paths,
+                   warehouse.inventory_manager.version,
+                   tuple((r.position, r.state.value, r.path_index)
+                         for r in robot_manager.robots)
+                   if robot_manager else None)
+            if sig == st.session_state.get('last_viz_sig'):
+                fig = st.session_state.get('last_viz_fig')
+            else:
+                # Choose visualization based on sidebar selection
+                if view_mode == "2D Top‑Down":
+                    fig = visualize_warehouse_plotly(warehouse, robot_manager, show_grid=show_grid, show_paths=show_paths)
+                elif view_mode == "3D View":
+                    fig = visualize_warehouse_plotly_3d(warehouse, robot_manager, show_grid=show_grid, show_paths=show_paths)
+                elif view_mode == "Heatmap":
+                    fig = visualize_warehouse_heatmap(warehouse, robot_manager, show_grid=show_grid)
+                else:
+                    fig = None
+                st.session_state.last_viz_sig = sig
+                st.session_state.last_viz_fig = fig
+            if fig is not None:
+                # A stable key keeps the same chart component across
+                # fragment reruns, so the frontend diffs the new figure
+                # into the existing plot instead of re-initializing it
+                st.plotly_chart(fig, use_container_width=True,
+                                config={'displayModeBar': True},
+                                key="live_viz")
+
+        live_visualization()
 
     with col2:
         # Controls in tabs: Inventory, Search, Warehouse, Robots
@@ -542,7 +723,8 @@ def main():
                 category_new = st.text_input("Category", key="new_category", placeholder="e.g., Electronics")
                 
                 # Get available shelves
-                available_shelves = sorted(warehouse.shelf_lookup.keys())
+                available_shelves = _sorted_shelf_ids(
+                    warehouse, len(warehouse.shelf_lookup))
                 shelf_new = st.selectbox("Shelf Location", available_shelves, key="new_shelf")
                 
                 qty_new = st.number_input("Quantity", min_value=1, value=1, key="new_qty")
@@ -594,21 +776,9 @@ def main():
             # View All Items
             st.subheader("📋 All Items")
             if items:
-                # Create a DataFrame for better display
-                items_data = []
-                for i in items:
-                    arrival_str = i.arrival_time.strftime('%d/%m/%Y %H:%M:%S') if i.arrival_time else "N/A"
-                    expiry_str = i.expiry.strftime('%d/%m/%Y %H:%M:%S') if i.expiry else "N/A"
-                    items_data.append({
-                        "SKU": i.sku,
-                        "Name": i.name,
-                        "Category": i.category,
-                        "Quantity": i.quantity,
-                        "Shelf": i.shelf_location,
-                        "Expiry": expiry_str
-                    })
-                
-                df = pd.DataFrame(items_data)
+                df = _items_dataframe(
+                    warehouse.inventory_manager,
+                    warehouse.inventory_manager.version)
                 st.dataframe(df, use_container_width=True, hide_index=True)
                 st.write(f"**Total Items:** {len(items)}")
             else:
@@ -632,10 +802,8 @@ def main():
                         st.write(f"**Quantity:** {item.quantity}")
                     with col_b:
                         st.write(f"**Shelf:** {item.shelf_location}")
-                        arrival_str = item.arrival_time.strftime('%d/%m/%Y %H:%M:%S') if item.arrival_time else "N/A"
-                        st.write(f"**Arrival:** {arrival_str}")
-                        expiry_str = item.expiry.strftime('%d/%m/%Y %H:%M:%S') if item.expiry else "N/A"
-                        st.write(f"**Expiry:** {expiry_str}")
+                        st.write(f"**Arrival:** {item.arrival_str}")
+                        st.write(f"**Expiry:** {item.expiry_str}")
                 else:
                     st.error("❌ Item not found")
             
@@ -661,7 +829,8 @@ def main():
             
             # View Shelf Details
             st.write("**View Shelf Details**")
-            available_shelves = sorted(warehouse.shelf_lookup.keys())
+            available_shelves = _sorted_shelf_ids(
+                warehouse, len(warehouse.shelf_lookup))
             shelf_select = st.selectbox("Select Shelf", [""] + available_shelves, key="shelf_select")
             if shelf_select:
                 info = warehouse.get_shelf_info(shelf_select)
@@ -688,9 +857,11 @@ def main():
             
             # Warehouse Status Summary
             if st.button("📊 Refresh Status", use_container_width=True):
+                _warehouse_status.clear()
                 st.rerun()
             
-            status = warehouse.get_warehouse_status()
+            status = _warehouse_status(
+                warehouse, warehouse.inventory_manager.version)
             
             st.write("**Warehouse Summary**")
             col_e, col_f, col_g = st.columns(3)
@@ -712,43 +883,33 @@ def main():
             
             # Shelf Status
             st.write("**Shelf Status**")
-            shelf_status_data = []
-            for shelf_id, info in status['shelves'].items():
-                if info:
-                    shelf_status_data.append({
-                        "Shelf": shelf_id,
-                        "Used": info['current_load'],
-                        "Capacity": info['capacity'],
-                        "Available": info['available_space'],
-                        "Items": info['item_count']
-                    })
-            
-            if shelf_status_data:
-                df_shelves = pd.DataFrame(shelf_status_data)
-                st.dataframe(df_shelves, use_container_width=True, hide_index=True)
+            shelf_rows = [(shelf_id, info)
+                          for shelf_id, info in status['shelves'].items()
+                          if info]
+            if shelf_rows:
+                # Column-wise construction — one list per column goes
+                # straight into the frame instead of pandas coercing a
+                # dict per row. Small and static per rerun, so st.table
+                # renders plain HTML instead of shipping an Arrow
+                # payload to the interactive grid component
+                df_shelves = pd.DataFrame({
+                    "Shelf": [sid for sid, _ in shelf_rows],
+                    "Used": [info['current_load'] for _, info in shelf_rows],
+                    "Capacity": [info['capacity'] for _, info in shelf_rows],
+                    "Available": [info['available_space'] for _, info in shelf_rows],
+                    "Items": [info['item_count'] for _, info in shelf_rows]
+                })
+                st.table(df_shelves)
             
             st.markdown("---")
             
             # Items Expiring Soon
             st.write("**Items Expiring Soon**")
-            expiry_items = warehouse.inventory_manager.expiry_index
-            if expiry_items:
-                expiry_data = []
-                for item in expiry_items[:20]:  # Show first 20
-                    if item.expiry:
-                        days_until = (item.expiry - datetime.now()).days
-                        status_text = "EXPIRED" if days_until < 0 else f"{days_until} days"
-                        expiry_data.append({
-                            "SKU": item.sku,
-                            "Name": item.name,
-                            "Shelf": item.shelf_location,
-                            "Expiry Date": item.expiry.strftime('%d/%m/%Y'),
-                            "Status": status_text
-                        })
-                
-                if expiry_data:
-                    df_expiry = pd.DataFrame(expiry_data)
-                    st.dataframe(df_expiry, use_container_width=True, hide_index=True)
+            df_expiry = _build_expiry_frame(
+                warehouse.inventory_manager,
+                warehouse.inventory_manager.version)
+            if df_expiry is not None:
+                st.table(df_expiry)
             else:
                 st.info("No items with expiry dates")
             
@@ -756,7 +917,8 @@ def main():
             
             # Database Statistics
             st.write("**Database Statistics**")
-            db_stats = warehouse.get_database_stats()
+            db_stats = _cached_db_stats(
+                warehouse, warehouse.inventory_manager.version)
             
             st.write("**Inventory:**")
             st.write(f"- Items (SKUs): {db_stats['inventory']['item_count']}")
@@ -776,13 +938,11 @@ def main():
             if robot_manager:
                 # Request item
                 st.write("**Request Item Retrieval**")
-                # Build dropdown options: "SKU - Item Name (Category)"
-                sku_options = []
-                sku_to_sku_value = {}
-                for i in items:
-                    label = f"{i.sku} - {i.name} ({i.category})"
-                    sku_options.append(label)
-                    sku_to_sku_value[label] = i.sku
+                # Dropdown options ("SKU - Item Name (Category)") come
+                # from the version-keyed cache
+                sku_options, sku_to_sku_value = _sku_dropdown(
+                    warehouse.inventory_manager,
+                    warehouse.inventory_manager.version)
                 if sku_options:
                     selected_label = st.selectbox("Select SKU to retrieve:", sku_options, key="sku_selectbox")
                     # Extract SKU value from selection
@@ -795,7 +955,7 @@ def main():
                     if selected_sku:
                         task_id = robot_manager.request_item(selected_sku)
                         if task_id:
-                            st.success(f"✅ Task created: {task_id[:8]}...")
+                            st.success(f"✅ Task created: #{task_id}")
                         else:
                             st.error("❌ Item not found or invalid")
                     else:
@@ -803,36 +963,52 @@ def main():
                 
                 st.markdown("---")
                 
-                # Robot statuses
-                st.write("**Robot Status**")
-                robot_statuses = robot_manager.get_robot_statuses()
-                for status in robot_statuses:
-                    with st.expander(f"🤖 {status['robot_id']}"):
-                        st.write(f"**State:** {status['state']}")
-                        st.write(f"**Position:** {status['position']}")
-                        st.write(f"**Queue:** {status['queue_length']} tasks")
-                        if status['current_task']:
-                            st.write(f"**Current Task:** {status['current_task'][:8]}...")
-                        if status['carrying_item']:
-                            st.write(f"**Carrying:** {status['carrying_item']}")
-                
+                # Robot statuses — own fragment, so status polling
+                # never reruns the rest of the page
+                @st.fragment(
+                    run_every=2 if st.session_state.simulation_running else None)
+                def robot_status_fragment():
+                    st.write("**Robot Status**")
+                    robot_statuses = _cached_robot_statuses(
+                        robot_manager, robot_manager._next_task_id)
+                    for status in robot_statuses:
+                        with st.expander(f"🤖 {status['robot_id']}"):
+                            st.write(f"**State:** {status['state']}")
+                            st.write(f"**Position:** {status['position']}")
+                            st.write(f"**Queue:** {status['queue_length']} tasks")
+                            if status['current_task']:
+                                st.write(f"**Current Task:** #{status['current_task']}")
+                            if status['carrying_item']:
+                                st.write(f"**Carrying:** {status['carrying_item']}")
+
+                robot_status_fragment()
+
                 st.markdown("---")
-                
-                # Task queue
-                st.write("**Task Queue**")
-                all_tasks = robot_manager.get_all_tasks()
-                if all_tasks:
-                    for task in all_tasks[-10:]:  # Show last 10 tasks
-                        status_color = {
-                            "pending": "🟡",
-                            "in_progress": "🔵",
-                            "completed": "🟢",
-                            "failed": "🔴"
-                        }
-                        status_icon = status_color.get(task['status'], "⚪")
-                        st.write(f"{status_icon} {task['sku']} - {task['status']}")
-                else:
-                    st.info("No tasks in queue")
+
+                # Task queue — same polling arrangement as the statuses
+                @st.fragment(
+                    run_every=2 if st.session_state.simulation_running else None)
+                def task_queue_fragment():
+                    st.write("**Task Queue**")
+                    all_tasks = _cached_all_tasks(
+                        robot_manager, robot_manager._next_task_id)
+                    if all_tasks:
+                        # Render only a visible window — long histories
+                        # get a slider instead of formatting every task
+                        if len(all_tasks) > 50:
+                            start = st.slider(
+                                "Task window start", 0, len(all_tasks) - 50,
+                                len(all_tasks) - 50, key="task_window_start")
+                            window = all_tasks[start:start + 50]
+                        else:
+                            window = all_tasks[-10:]  # Show last 10 tasks
+                        for task in window:
+                            status_icon = _TASK_STATUS_ICONS.get(task['status'], "⚪")
+                            st.write(f"{status_icon} {task['sku']} - {task['status']}")
+                    else:
+                        st.info("No tasks in queue")
+
+                task_queue_fragment()
             else:
                 st.info("Initialize warehouse first to use robot features")
     # Summary metrics below columns
@@ -841,13 +1017,12 @@ def main():
     with col3:
         st.metric("Total Items", len(items) if items else 0)
     with col4:
-        total_qty = sum(item.quantity for item in items) if items else 0
-        st.metric("Total Quantity", total_qty)
+        st.metric("Total Quantity", warehouse.inventory_manager.total_quantity)
     with col5:
         if robot_manager:
-            total_tasks = len(robot_manager.all_tasks)
-            completed = sum(1 for task in robot_manager.all_tasks.values() if task.status == "completed")
-            st.metric("Tasks Completed", f"{completed}/{total_tasks}")
+            st.metric("Tasks Completed",
+                      f"{robot_manager.completed_task_count}"
+                      f"/{robot_manager.total_task_count}")
 
 
 if __name__ == "__main__":
@@ -87,6 +87,64 @@ def test_expiry_ordering_and_reload():
     print("✅ Expiry items loaded correctly from DB.")
 
 
+def test_bulk_add_dup_skip_and_lazy_sort():
+    print("\n🧩 TEST 4: Bulk Add, Duplicate Skip and Lazy Expiry Sort")
+    manager = InventoryManager()
+    now = datetime.now()
+    before_qty = manager.total_quantity
+
+    # Expiries deliberately out of order so the bulk path has to defer
+    # its sort; the duplicate SKU must be skipped, not merged
+    manager.add_items_bulk([
+        Item("B1", "Yogurt", "Dairy", "Y1", 4, expiry=now + timedelta(days=7)),
+        Item("B2", "Butter", "Dairy", "Y2", 6, expiry=now + timedelta(days=2)),
+        Item("B1", "Duplicate", "Dairy", "Y3", 99),
+        Item("B3", "Salt", "Pantry", "Y4", 8),
+    ])
+    assert manager.get_by_sku("B1").name == "Yogurt", "❌ Duplicate SKU not skipped!"
+    assert manager.total_quantity == before_qty + 18, "❌ Quantity counter wrong after bulk add!"
+    print("✅ Duplicate SKU skipped and quantity counter updated.")
+
+    index = manager.expiry_index
+    assert index == sorted(index, key=lambda i: i.expiry), "❌ Expiry index not sorted after bulk add!"
+    order = {i.sku: n for n, i in enumerate(index)}
+    assert order["B2"] < order["B1"], "❌ Expiry ordering failed after bulk add!"
+    print("✅ Expiry index sorted after out-of-order bulk add.")
+
+    # Reload and verify the single-transaction write persisted everything
+    new_manager = InventoryManager()
+    assert new_manager.get_by_sku("B1").name == "Yogurt", "❌ Bulk items not persisted!"
+    assert new_manager.get_by_sku("B3").quantity == 8, "❌ Bulk items not persisted!"
+    assert new_manager.total_quantity == manager.total_quantity, "❌ Quantity counter lost on reload!"
+    reload_index = new_manager.expiry_index
+    assert reload_index == sorted(reload_index, key=lambda i: i.expiry), "❌ Expiry ordering lost on reload!"
+    print("✅ Bulk-added items and ordering survived a reload.")
+
+
+def test_shelf_load_counter_consistency():
+    print("\n🧩 TEST 5: Shelf Load Counter Consistency")
+    from warehouse.layout import Warehouse
+    from warehouse.models import ShelfLocation
+    from integrated_warehouse import IntegratedWarehouse
+
+    w = Warehouse(5, 5)
+    w.add_shelf(ShelfLocation("T", (1, 1), capacity=10))
+    iw = IntegratedWarehouse(warehouse=w, load_from_db=False)
+
+    iw.add_item(Item("C1", "Bolt", "Hardware", "T", 4))
+    iw.add_item(Item("C2", "Nut", "Hardware", "T", 3))
+    shelf = iw.shelf_lookup["T"]
+    expected = sum(i.quantity for i in iw.inventory_manager.get_by_shelf("T"))
+    assert shelf.current_load == expected, "❌ current_load drifted from shelf index after add!"
+    print("✅ current_load matches the shelf index after adds.")
+
+    iw.remove_item("C1")
+    expected = sum(i.quantity for i in iw.inventory_manager.get_by_shelf("T"))
+    assert shelf.current_load == expected, "❌ current_load drifted from shelf index after remove!"
+    print("✅ current_load matches the shelf index after a removal.")
+    iw.remove_item("C2")
+
+
 def main():
     print("\n🚀 Running Inventory Manager Tests")
 
@@ -99,6 +157,12 @@ def main():
     clean_database()
     test_expiry_ordering_and_reload()
 
+    clean_database()
+    test_bulk_add_dup_skip_and_lazy_sort()
+
+    clean_database()
+    test_shelf_load_counter_consistency()
+
     print("\n🎉 All persistence tests passed successfully!")
 
 
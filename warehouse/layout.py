@@ -1,21 +1,73 @@
 # warehouse/layout.py
-from typing import List
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
 from .models import ShelfLocation, SpecialNode, GridCell
 
+# Single shared "free" cell: empty cells are indistinguishable and only
+# ever replaced (never mutated in place), so the whole grid can point at
+# one instance instead of allocating rows*cols of them
+_FREE_CELL = GridCell("free")
+
+# Shared lane cells, same replacement-only reasoning as _FREE_CELL —
+# lets create_robot_lanes fill whole row segments with mask writes
+_LANE_BWD = GridCell("lane_backward", direction="backward")
+_LANE_FWD = GridCell("lane_forward", direction="forward")
+_LANE_BOTH = GridCell("lane", direction="both")
+
+# Cell types as small int codes, with a parallel symbol table so
+# display() renders via one fancy-index instead of a per-cell dict.get.
+# The last code is the fallback for unknown types.
+_CELL_TYPE_ORDER = ("free", "lane", "lane_forward", "lane_backward",
+                    "shelf", "dock", "packing", "truck_bay")
+_CELL_TYPE_CODE = {t: i for i, t in enumerate(_CELL_TYPE_ORDER)}
+_UNKNOWN_CODE = len(_CELL_TYPE_ORDER)
+_CELL_SYMBOLS = np.array(
+    [". ", "R ", "→ ", "← ", "S ", "D ", "P ", "T ", "? "])
+
+
 class Warehouse:
     """Models the warehouse layout using a 2D grid representation."""
 
     def __init__(self, rows: int, cols: int):
         self.rows = rows
         self.cols = cols
-        self.grid: List[List[GridCell]] = [
-            [GridCell("free") for _ in range(cols)] for _ in range(rows)
-        ]
+        self.grid: np.ndarray = np.full((rows, cols), _FREE_CELL, dtype=object)
+        # int8 cell-type codes kept in sync with self.grid by _set_cell;
+        # lets display() and other scans work vectorized
+        self._type_grid = np.zeros((rows, cols), dtype=np.int8)
+        # Bumped by every grid mutation so consumers caching derived
+        # data (e.g. the pathfinder's passable grid) can detect stale
+        # state without rescanning the grid
+        self.layout_version: int = 0
         self.shelves: List[ShelfLocation] = []
+        # id -> shelf index, kept in sync by add_shelf so lookups never
+        # need a linear scan over self.shelves
+        self._shelves_by_id: Dict[str, ShelfLocation] = {}
         self.special_nodes: List[SpecialNode] = []
+        # node_type -> nodes of that type, kept in sync by
+        # add_special_node so dock/packing lookups never scan the list
+        self._nodes_by_type: Dict[str, List[SpecialNode]] = {}
+        # Per-type (N, 2) coordinate arrays for nearest-node queries,
+        # built lazily and dropped when a node of that type is added
+        self._node_coords_by_type: Dict[str, np.ndarray] = {}
+        # (N, 2) shelf coordinate array for vectorized consumers (the
+        # visualizations read it every frame); rebuilt after add_shelf
+        self._shelf_coords: Optional[np.ndarray] = None
+        # Coordinates converted to lanes by create_robot_lanes, in
+        # creation order — lets callers pick a traversable cell without
+        # scanning the grid
+        self._lane_cells: List[tuple] = []
 
     # -------- Placement Methods --------
 
+    def _set_cell(self, r: int, c: int, cell: GridCell):
+        """Replace a grid cell, keeping the type-code grid in sync."""
+        self.grid[r][c] = cell
+        self._type_grid[r, c] = _CELL_TYPE_CODE.get(cell.cell_type, _UNKNOWN_CODE)
+        self.layout_version += 1
+
     def add_shelf(self, shelf: ShelfLocation):
         """Places a shelf in a free cell of the grid."""
         r, c = shelf.coordinates
@@ -23,8 +75,40 @@ class Warehouse:
             raise ValueError(f"Shelf {shelf.id} position {shelf.coordinates} out of bounds.")
         if self.grid[r][c].cell_type != "free":
             raise ValueError(f"Cell {shelf.coordinates} is already occupied.")
-        self.grid[r][c] = GridCell("shelf", shelf=shelf)
+        self._set_cell(r, c, GridCell("shelf", shelf=shelf))
         self.shelves.append(shelf)
+        self._shelves_by_id[shelf.id] = shelf
+        self._shelf_coords = None
+
+    def add_shelves_bulk(self, shelves: List[ShelfLocation]):
+        """
+        Places many shelves in one pass. All positions are validated
+        up front so a bad entry leaves the grid untouched, and the
+        shelf-coordinate cache is rebuilt once instead of per shelf.
+        """
+        # Bounds and occupancy checks run with everything bound to
+        # locals — attribute chains in the validation loop are what
+        # dominate bulk construction
+        grid = self.grid
+        rows, cols = self.rows, self.cols
+        for shelf in shelves:
+            r, c = shelf.coordinates
+            if not (0 <= r < rows and 0 <= c < cols):
+                raise ValueError(f"Shelf {shelf.id} position {shelf.coordinates} out of bounds.")
+            if grid[r][c].cell_type != "free":
+                raise ValueError(f"Cell {shelf.coordinates} is already occupied.")
+        shelf_list = self.shelves
+        by_id = self._shelves_by_id
+        shelf_code = _CELL_TYPE_CODE["shelf"]
+        type_grid = self._type_grid
+        for shelf in shelves:
+            r, c = shelf.coordinates
+            grid[r][c] = GridCell("shelf", shelf=shelf)
+            type_grid[r, c] = shelf_code
+            shelf_list.append(shelf)
+            by_id[shelf.id] = shelf
+        self._shelf_coords = None
+        self.layout_version += 1
 
     def add_special_node(self, node: SpecialNode):
         """Places a special node (dock, packing, truck bay) in the grid."""
@@ -33,8 +117,43 @@ class Warehouse:
             raise ValueError(f"{node.node_type} at {node.coordinates} out of bounds.")
         if self.grid[r][c].cell_type != "free":
             raise ValueError(f"Cannot place {node.node_type} at {node.coordinates}: cell occupied.")
-        self.grid[r][c] = GridCell(node.node_type, node=node)
+        self._set_cell(r, c, GridCell(node.node_type, node=node))
         self.special_nodes.append(node)
+        self._nodes_by_type.setdefault(node.node_type, []).append(node)
+        self._node_coords_by_type.pop(node.node_type, None)
+
+    @property
+    def shelf_coords(self) -> np.ndarray:
+        """
+        (N, 2) int32 array of shelf (row, col) coordinates, one row per
+        entry of self.shelves. Built lazily and rebuilt only after a
+        shelf is added, so per-frame consumers skip the attribute walk.
+        """
+        if self._shelf_coords is None:
+            self._shelf_coords = np.array(
+                [s.coordinates for s in self.shelves], dtype=np.int32
+            ).reshape(len(self.shelves), 2)
+        return self._shelf_coords
+
+    def nearest_special_node(self, node_type: str,
+                             pos: Tuple[int, int]) -> Optional[SpecialNode]:
+        """
+        Return the node of the given type closest to pos by Manhattan
+        distance, or None if no such node exists. Coordinates are cached
+        per type as an (N, 2) array so the query is one vectorized
+        argmin rather than a Python scan.
+        """
+        nodes = self._nodes_by_type.get(node_type)
+        if not nodes:
+            return None
+        if len(nodes) == 1:
+            return nodes[0]
+        coords = self._node_coords_by_type.get(node_type)
+        if coords is None:
+            coords = np.array([n.coordinates for n in nodes], dtype=np.int32)
+            self._node_coords_by_type[node_type] = coords
+        dist = np.abs(coords[:, 0] - pos[0]) + np.abs(coords[:, 1] - pos[1])
+        return nodes[int(np.argmin(dist))]
 
     def create_robot_lanes(self, lane_rows: List[int], bidirectional: bool = True):
         """
@@ -47,23 +166,28 @@ class Warehouse:
         for r in lane_rows:
             if not (0 <= r < self.rows):
                 raise ValueError(f"Lane row {r} out of bounds.")
-            
+
+            # Free cells in the row, written as masked slice assignments
+            # instead of a per-column Python branch
+            free = self._type_grid[r] == _CELL_TYPE_CODE["free"]
             if bidirectional:
-                # Create bidirectional lanes: left half for backward, right half for forward
+                # Bidirectional lanes: left half backward, right half forward
                 mid_col = self.cols // 2
-                for c in range(self.cols):
-                    if self.grid[r][c].cell_type == "free":
-                        if c < mid_col:
-                            # Backward lane (left side)
-                            self.grid[r][c] = GridCell("lane_backward", direction="backward")
-                        else:
-                            # Forward lane (right side)
-                            self.grid[r][c] = GridCell("lane_forward", direction="forward")
+                bwd = free.copy()
+                bwd[mid_col:] = False
+                fwd = free.copy()
+                fwd[:mid_col] = False
+                self.grid[r, bwd] = _LANE_BWD
+                self.grid[r, fwd] = _LANE_FWD
+                self._type_grid[r, bwd] = _CELL_TYPE_CODE["lane_backward"]
+                self._type_grid[r, fwd] = _CELL_TYPE_CODE["lane_forward"]
             else:
                 # Single direction lane
-                for c in range(self.cols):
-                    if self.grid[r][c].cell_type == "free":
-                        self.grid[r][c] = GridCell("lane", direction="both")
+                self.grid[r, free] = _LANE_BOTH
+                self._type_grid[r, free] = _CELL_TYPE_CODE["lane"]
+            self._lane_cells.extend(
+                (r, int(c)) for c in np.nonzero(free)[0])
+            self.layout_version += 1
 
     # -------- Display & Utility --------
 
@@ -72,21 +196,9 @@ class Warehouse:
 
     def display(self):
         """Displays the warehouse layout as a grid."""
-        symbols = {
-            "free": ". ",
-            "lane": "R ",
-            "lane_forward": "→ ",
-            "lane_backward": "← ",
-            "shelf": "S ",
-            "dock": "D ",
-            "packing": "P ",
-            "truck_bay": "T ",
-        }
-
+        # One fancy-index over the type-code grid replaces a dict
+        # lookup per cell
+        symbols = _CELL_SYMBOLS[self._type_grid]
         print("\nWarehouse Grid Layout:")
-        for r in range(self.rows):
-            row = ""
-            for c in range(self.cols):
-                row += symbols.get(self.grid[r][c].cell_type, "? ")
-            print(row)
+        print("\n".join("".join(row) for row in symbols))
         print()
@@ -2,7 +2,7 @@
 from dataclasses import dataclass
 from typing import Tuple, Optional
 
-@dataclass
+@dataclass(slots=True)
 class ShelfLocation:
     """Represents a shelf or bin in the warehouse."""
     id: str
@@ -15,14 +15,14 @@ class ShelfLocation:
         return self.current_load >= self.capacity
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SpecialNode:
     """Represents special operational zones like docks, packing, or truck bays."""
     node_type: str  # "dock", "truck_bay", "packing"
     coordinates: Tuple[int, int]
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GridCell:
     """Represents a single cell in the warehouse grid."""
     cell_type: str  # "free", "shelf", "lane", "lane_forward", "lane_backward", "dock", "truck_bay", "packing"